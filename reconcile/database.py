@@ -4,7 +4,7 @@ import sys
 from collections.abc import Iterable
 from typing import Any
 
-from utils import path_check
+from utils import batcher, path_check
 
 # Load configuration
 config = configparser.ConfigParser()
@@ -59,6 +59,39 @@ class Database:
     ) -> None:
         self.cursor.executemany(sql, params or ())
 
+    def executemany_batched(
+        self, sql: str, params: Iterable[Any], batch_size: int = 10_000
+    ) -> None:
+        """
+        Like executemany(), but commit every {batch_size} rows so each transaction and
+        its journal stay bounded however long {params} is.
+        """
+        for batch in batcher(iter(params), batch_size):
+            with self.connection:
+                self.executemany(sql, batch)
+
+    def set_bulk_load_pragmas(self) -> None:
+        """
+        Trade durability for write speed while the tables are being built. The
+        database can simply be recreated if a load is interrupted.
+
+        This is the one place SQLite is tuned; call it once at the start of each bulk
+        load entry point (e.g. create-db) rather than setting PRAGMAs piecemeal.
+        """
+        self.execute("PRAGMA journal_mode = MEMORY")
+        self.execute("PRAGMA synchronous = OFF")
+        self.execute("PRAGMA temp_store = MEMORY")
+        self.execute("PRAGMA cache_size = -262144")  # 256 MiB
+        self.execute("PRAGMA mmap_size = 30000000000")
+
+    def set_default_pragmas(self) -> None:
+        """
+        Restore SQLite's default journal and sync settings once a bulk load is done, so
+        the database is left as a single self-contained file.
+        """
+        self.execute("PRAGMA journal_mode = DELETE")
+        self.execute("PRAGMA synchronous = FULL")
+
     def fetchall(self) -> list[Any]:
         return self.cursor.fetchall()
 
@@ -69,7 +102,44 @@ class Database:
         self.cursor.execute(sql, params or ())
         return self.fetchall()
 
-    def get_ol_ia_id_differences(self) -> list[Any]:
+    def query_iter(self, sql: str, params: tuple[str] | None = None) -> sqlite3.Cursor:
+        """
+        Like query(), but return a fresh cursor to iterate over rather than fetching
+        every row into memory. The rows are streamed from SQLite as they're consumed.
+        """
+        return self.connection.execute(sql, params or ())
+
+    def query_iter_flag_duplicates(self, sql: str) -> sqlite3.Cursor:
+        """
+        Like query_iter(), but each row of {sql} gets a trailing column that is 1 on
+        the first occurrence of a distinct row and 0 on its repeats. That way the rows
+        and their de-duplicated count come from a single run of {sql}. The rows keep
+        the order {sql} returns them in.
+        """
+        # Only prepare {sql} to learn how many columns it returns. The report queries
+        # may repeat a column name, so the CTE renames them by position.
+        prepared = self.connection.execute(f"SELECT * FROM ({sql}) LIMIT 0")
+        width = len(prepared.description)
+        columns = ", ".join(f"c{i}" for i in range(width))
+        return self.connection.execute(
+            f"""
+            WITH report({columns}) AS ({sql}),
+                 numbered AS (SELECT *, ROW_NUMBER() OVER () AS row_order FROM report),
+                 flagged AS (
+                     SELECT *,
+                            ROW_NUMBER() OVER (PARTITION BY {columns}) = 1 AS first_seen
+                     FROM   numbered
+                 )
+            SELECT {columns}, first_seen
+            FROM   flagged
+            ORDER  BY row_order
+            """
+        )
+
+    # The get_*_sql() methods below return the SQL for each report. Run them with
+    # query_iter() or query_iter_flag_duplicates() to stream the rows.
+
+    def get_ol_ia_id_differences_sql(self) -> str:
         """
         Get inconsistent Open Library IDs (OLIDs) based on the associated Internet
         Archive OCAID, according to the OLID that Open Library itself associates
@@ -77,15 +147,22 @@ class Database:
         ocaid.
         """
         sql = """
-        SELECT *
+        SELECT ia.ia_id,
+               ia.ia_ol_edition_id,
+               ia.ia_ol_work_id,
+               ol.ol_edition_id,
+               ia.resolved_ia_ol_work_id,
+               ia.resolved_ia_ol_work_from_edition
         FROM   ia
-        WHERE  ia_ol_edition_id IS NOT ol_edition_id
-        AND    ol_edition_id IS NOT NULL
-        AND    ia_ol_edition_id IS NOT NULL
+               INNER JOIN ol
+                       ON ia.ia_id = ol.ol_ocaid
+        WHERE  ia.ia_ol_edition_id IS NOT ol.ol_edition_id
+        AND    ol.ol_edition_id IS NOT NULL
+        AND    ia.ia_ol_edition_id IS NOT NULL
         """
-        return self.query(sql)
+        return sql
 
-    def get_editions_with_multiple_works(self) -> list[Any]:
+    def get_editions_with_multiple_works_sql(self) -> str:
         """
         Get records where an Open Library Edition has more than one associated Work.
         """
@@ -94,32 +171,16 @@ class Database:
         FROM   ol
         WHERE  has_multiple_works IS 1
         """
-        return self.query(sql)
+        return sql
 
-    def get_ocaid_where_ol_edition_has_ocaid_and_ia_has_no_ol_edition(
+    def get_ocaid_where_ol_edition_has_ocaid_and_ia_has_no_ol_edition_sql(
         self,
-    ) -> list[Any]:
+    ) -> str:
         """
         Get records where an Open Library edition has an OCAID but Internet
         Archive has no Open Library edition associated with that OCAID.
         """
         sql = """
-        SELECT ia_id,
-               ol_edition_id
-        FROM   ia
-        WHERE  ol_edition_id IS NOT NULL
-               AND ia_ol_edition_id IS NULL
-        """
-        return self.query(sql)
-
-    def get_ocaid_where_ol_edition_has_ocaid_and_ia_has_no_ol_edition_join(
-        self,
-    ) -> list[Any]:
-        """
-        Same as get_records_where_ol_has_ocaid_but_ia_has_no_ol_edition, but this time
-        using a database inner join.
-        """
-        sql = """
         SELECT ia.ia_id,
                ol.ol_edition_id
         FROM   ia
@@ -127,9 +188,9 @@ class Database:
                        ON ia.ia_id = ol.ol_ocaid
         WHERE  ia.ia_ol_edition_id IS NULL
         """
-        return self.query(sql)
+        return sql
 
-    def get_ia_links_to_ol_but_ol_edition_has_no_ocaid(self) -> list[Any]:
+    def get_ia_links_to_ol_but_ol_edition_has_no_ocaid_sql(self) -> str:
         """
         Get records where Internet Archive links to an Open Library Edition, but that
         Open Library Edition has no OCAID.
@@ -142,9 +203,9 @@ class Database:
                        ON ia.ia_ol_edition_id = ol.ol_edition_id
         WHERE  ol.ol_ocaid IS NULL
         """
-        return self.query(sql)
+        return sql
 
-    def get_ia_links_to_ol_but_ol_edition_has_no_ocaid_jsonl(self) -> list[Any]:
+    def get_ia_links_to_ol_but_ol_edition_has_no_ocaid_jsonl_sql(self) -> str:
         """
         Get records where Internet Archive links to an Open Library Edition, but that
         Open Library Edition has no OCAID.
@@ -166,11 +227,11 @@ class Database:
         WHERE  ol.ol_ocaid IS NULL and ia_jsonl.sole_isbn_13 is 1
         """
         # WHERE  ol.ol_ocaid IS NULL and ia_jsonl.sole_isbn_13 is 1 and ol.isbn_13 = ia_jsonl.isbn_13
-        return self.query(sql)
+        return sql
 
-    def get_ia_links_to_ol_but_ol_edition_has_no_ocaid_jsonl_multiple(
+    def get_ia_links_to_ol_but_ol_edition_has_no_ocaid_jsonl_multiple_sql(
         self,
-    ) -> list[Any]:
+    ) -> str:
         """
         Get records where Internet Archive links to an Open Library Edition, but that
         Open Library Edition has no OCAID. And that have multiple ISBN 13s.
@@ -183,9 +244,9 @@ class Database:
                     ON ia_jsonl.ol_edition_id = ol.ol_edition_id
         WHERE  ol.ol_ocaid IS NULL and ia_jsonl.multiple_isbn_13 is 1
         """
-        return self.query(sql)
+        return sql
 
-    def get_ia_item_has_one_isbn_13_and_no_link_to_ol(self) -> list[Any]:
+    def get_ia_item_has_one_isbn_13_and_no_link_to_ol_sql(self) -> str:
         """
         Get records where Internet Archive has one ISBN 13 and there is no link to Open Library.
         Does this need to limit the collection?
@@ -195,9 +256,9 @@ class Database:
         FROM ia_jsonl
         WHERE ia_jsonl.sole_isbn_13 IS 1 AND ia_jsonl.ol_edition_id IS NULL OR ia_jsonl.ol_edition_id IS ""
         """
-        return self.query(sql)
+        return sql
 
-    def get_ol_edition_has_ocaid_but_no_ia_source_record(self) -> list[Any]:
+    def get_ol_edition_has_ocaid_but_no_ia_source_record_sql(self) -> str:
         """
         Get records where an Open Library Edition has an OCAID but the source_record
         key has no 'ia:<ocaid>' value.
@@ -209,9 +270,9 @@ class Database:
         WHERE  ol.ol_ocaid IS NOT NULL
         AND    ol.has_ia_source_record IS 0
         """
-        return self.query(sql)
+        return sql
 
-    def get_work_ids_associated_with_different_ol_works(self) -> list[Any]:
+    def get_work_ids_associated_with_different_ol_works_sql(self) -> str:
         """
         Get Internet Archive OCAIDs (and Open Library Work IDs), where different Open
         Library Work IDs link to the same OCAID.
@@ -229,9 +290,9 @@ class Database:
         ON         ia.ia_id = ol.ol_ocaid
         WHERE      ia.ia_ol_work_id IS NOT ol.ol_work_id
         """
-        return self.query(sql)
+        return sql
 
-    def get_ia_id_with_same_ol_edition_id(self) -> list[Any]:
+    def get_ia_id_with_same_ol_edition_id_sql(self) -> str:
         """
         Get (Internet Archive OCAID, Open Library Edition ID) pairings where the Open
         Library edition ID is associated with more than one Internet Archive OCAID.
@@ -253,9 +314,11 @@ class Database:
                  ON a.ia_ol_edition_id = b.ia_ol_edition_id
         ORDER  BY a.ia_ol_edition_id
         """
-        return self.query(sql)
+        return sql
 
-    def get_broken_ol_ia_backlinks_after_edition_to_work_resolution0(self) -> list[Any]:
+    def get_broken_ol_ia_backlinks_after_edition_to_work_resolution0_sql(
+        self,
+    ) -> str:
         """
         This appears to find backlinks that are definitely broken because the OCAIDs
         match but even after resolution, using works as a proxy, the IA link is
@@ -273,9 +336,11 @@ class Database:
         WHERE      ia.resolved_ia_ol_work_id IS NOT ol.resolved_ol_work_id
         AND        ia.ia_ol_work_id IS NOT ia.resolved_ia_ol_work_id
         """
-        return self.query(sql)
+        return sql
 
-    def get_broken_ol_ia_backlinks_after_edition_to_work_resolution1(self) -> list[Any]:
+    def get_broken_ol_ia_backlinks_after_edition_to_work_resolution1_sql(
+        self,
+    ) -> str:
         """
         Similar to version 1, but with many false positives. Seems to find works that
         are likely to be merge candidates. Even after resolution of works, the works
@@ -293,4 +358,4 @@ class Database:
         WHERE      ia.resolved_ia_ol_work_id IS NOT ol.resolved_ol_work_id
         AND        ia.ia_ol_work_id IS NOT NULL
         """
-        return self.query(sql)
+        return sql
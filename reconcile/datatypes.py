@@ -15,6 +15,10 @@ class ParsedRedirect:
     def to_list(self) -> list[str]:
         return [self.origin_id, self.destination_id]
 
+    def to_tsv_line(self) -> str:
+        """The redirect as a line of the parsed redirects TSV."""
+        return f"{self.origin_id}\t{self.destination_id}\n"
+
 
 @dataclass(frozen=True, slots=True)
 class ParsedEdition:
@@ -42,3 +46,18 @@ class ParsedEdition:
             self.has_cover,
             self.isbn_13s,
         ]
+
+    def to_tsv_line(self) -> str:
+        """
+        The edition as a line of the parsed editions TSV, with None written as "".
+        isbn_13s is left out; it goes in the covers file via to_cover_line().
+        """
+        return (
+            f"{self.edition_id}\t{self.work_id or ''}\t{self.ocaid or ''}\t"
+            f"{self.isbn_13}\t{self.has_multiple_works}\t{self.has_ia_source_record}\t"
+            f"{self.has_cover}\n"
+        )
+
+    def to_cover_line(self) -> str:
+        """The edition's ISBN 13s as a line of the parsed covers file."""
+        return f"{self.isbn_13s}\n"
@@ -1,17 +1,18 @@
 import configparser
-import csv
 import logging
 import mmap
 import sys
 import uuid
 from collections.abc import Iterable, Iterator
 from pathlib import Path
+from typing import Any
 
 from database import Database
 
 from reconcile.datatypes import ParsedEdition, ParsedRedirect
 from reconcile.openlibrary_editions import process_edition_line
 from reconcile.redirect_resolver import process_redirect_line
+from reconcile.utils import mmap_lines
 
 # Load configuration
 config = configparser.ConfigParser()
@@ -43,51 +44,55 @@ def make_chunk_ranges(file_name: str, size: int) -> list[tuple[int, int, str]]:
     """
     chunks: list[tuple[int, int, str]] = []
     path = Path(file_name)
-    cursor = 0
     file_end = path.stat().st_size
-
-    with path.open(mode="rb") as file:
-        while True:
-            chunk_start = cursor
-            file.seek(file.tell() + size, 0)
-            file.readline()  # Move the cursor to the bytes at the end of the line.
-            chunk_end = file.tell()
-            cursor = chunk_end
+    if not file_end:
+        return chunks
+
+    # Jump {size} bytes at a time and snap each boundary forward to the end of the line,
+    # finding the newline in the mapped file rather than reading the line.
+    with path.open(mode="rb") as file, mmap.mmap(
+        file.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mm:
+        chunk_start = 0
+        while chunk_start < file_end:
+            newline = mm.find(b"\n", chunk_start + size)
+            chunk_end = file_end if newline == -1 else newline + 1
             chunks.append((chunk_start, chunk_end, file_name))
-
-            if chunk_end > file_end:
-                break
+            chunk_start = chunk_end
 
     return chunks
 
 
-def read_chunk_lines(chunk: tuple[int, int, str]) -> Iterator[list[str]]:
+def read_chunk_lines(chunk: tuple[int, int, str]) -> Iterator[list[Any]]:
     """
-    Read a chunk and return its decoded line. Chunks are of the form:
+    Read a chunk and return its split line, with the JSON in the last field left as
+    bytes. Chunks are of the form:
     [(start_byte, end_byte, 'patht_to_file'), (...)]. E.g.:
     [(0, 32769146, '/path/to/file'), (32769146, 65538896, '/path/to/file')]
     """
     start, end, file = chunk
-    position = start
-
-    with open(file, "r+b") as fp:
-        mm = mmap.mmap(fp.fileno(), 0)
-        mm.seek(start)
-        for line in iter(mm.readline, b""):
-            position = mm.tell()
-            if position >= end:
-                return
 
-            yield line.decode("utf-8").split("\t")
+    with open(file, "rb") as fp, mmap.mmap(
+        fp.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mm:
+        # Each chunk is read front to back once, so let the kernel read ahead.
+        if hasattr(mmap, "MADV_SEQUENTIAL"):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        for line in mmap_lines(mm, start, end):
+            # The JSON is always the fifth and last field, so stop splitting there.
+            # Only decode the short leading fields; orjson parses the JSON bytes
+            # directly, which skips decoding the biggest field to str first.
+            fields = line.split(b"\t", 4)
+            yield [field.decode("utf-8") for field in fields[:4]] + fields[4:]
 
 
 def process_chunk_lines(
-    lines: Iterable[list[str]],
+    lines: Iterable[list[Any]],
 ) -> Iterator[ParsedRedirect | ParsedEdition]:
     """
     Process {lines} as returned by read_chunk_lines(). Each line looks like:
-    ['/type/edition', '/books/OL5756837M', '9', 'datetimestmap', '{JSON}']
-    ['/type/redirect', '/authors/OL10219261A', '2', 'datetimestmap', '{"location": "/authors/OL3894951A"}']  # noqa E501
+    ['/type/edition', '/books/OL5756837M', '9', 'datetimestmap', b'{JSON}']
+    ['/type/redirect', '/authors/OL10219261A', '2', 'datetimestmap', b'{"location": "/authors/OL3894951A"}']  # noqa E501
 
     Lines are then processed by their respective parsers, and a ParsedEdition Or ParsedRedirect
     is created to pass to write_processed_chunk_lines_to_disk().
@@ -117,45 +122,64 @@ def process_chunk_lines(
 
 def write_processed_chunk_lines_to_disk(
     lines: Iterable[ParsedEdition | ParsedRedirect], output_base: str
-) -> None:
+) -> Path:
     """
     Iterate through {lines} from process_chunk_lines() and write the lines to the
     relevant file based on the Open Library type found at index 0 of the tuple.
+
+    The ISBN 13s of editions with covers go in a separate covers file, as only
+    insert_ol_cover_data_into_cover_db() reads them.
+
+    Returns the path of the written editions file.
     """
     path = Path(output_base)
 
     edition_stem = path.stem + "_" + "edition" + "_" + uuid.uuid4().hex
     redirect_stem = path.stem + "_" + "redirect" + "_" + uuid.uuid4().hex
+    cover_stem = path.stem + "_" + "cover" + "_" + uuid.uuid4().hex
     unique_edition_fname = path.with_stem(edition_stem)
     unique_redirect_fname = path.with_stem(redirect_stem)
-
-    with unique_edition_fname.open(mode="w") as edition_fp, unique_redirect_fname.open(
-        mode="w"
-    ) as redirect_fp:
-        edition_writer = csv.writer(edition_fp, delimiter="\t")
-        redirect_writer = csv.writer(redirect_fp, delimiter="\t")
-
+    unique_cover_fname = path.with_stem(cover_stem)
+
+    # A 1 MiB buffer means each worker writes its output in large blocks.
+    buffering = 1024 * 1024
+    with unique_edition_fname.open(
+        mode="w", encoding="utf-8", buffering=buffering
+    ) as edition_fp, unique_redirect_fname.open(
+        mode="w", encoding="utf-8", buffering=buffering
+    ) as redirect_fp, unique_cover_fname.open(
+        mode="w", encoding="utf-8", buffering=buffering
+    ) as cover_fp:
+        # The fields never contain tabs or newlines, so format the lines directly
+        # rather than going through csv.writer's quoting logic.
         for line in lines:
             match line:
                 case ParsedEdition():
-                    edition_writer.writerow(line.to_list())
+                    edition_fp.write(line.to_tsv_line())
+                    if line.has_cover and line.isbn_13s:
+                        cover_fp.write(line.to_cover_line())
                 case ParsedRedirect():
-                    redirect_writer.writerow(line.to_list())
+                    redirect_fp.write(line.to_tsv_line())
                 case _:
                     logger.warning(
                         f"{line} fell through write_processed_chunk_lines_to_disk()"
                     )
                     continue
 
+    return unique_edition_fname
+
 
 def process_chunk(
     chunk: tuple[int, int, str], output_base: str = OL_DUMP_PARSED_PREFIX
-) -> None:
+) -> Path:
     """
     Take a tuple of chunks from make_chunk_ranges() and read the chunks from disk,
     process them, and write them back to disk with only the relevant information.
     This is used by the multiprocessing feature to combine the steps.
+
+    Returns the path of the chunk's parsed editions file so it can be loaded into the
+    database while it is still hot in the page cache.
     """
     lines = read_chunk_lines(chunk)
     processed_lines = process_chunk_lines(lines)
-    write_processed_chunk_lines_to_disk(processed_lines, output_base)
+    return write_processed_chunk_lines_to_disk(processed_lines, output_base)
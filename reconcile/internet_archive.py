@@ -1,12 +1,38 @@
 """
 Functions for working with Internet Archive files.
 """
+import csv
+import io
 from collections.abc import Iterator
+from pathlib import Path
 
 import orjson
-from isbnlib import to_isbn13
 from tqdm import tqdm
-from utils import bufcount
+from utils import isbn_10_to_13
+
+
+def read_ia_physical_direct_rows(filename: str) -> Iterator[list[str]]:
+    """
+    Read the IA physical direct dump at {filename} and yield the ia_id,
+    ia_ol_edition_id and ia_ol_work_id columns for the ia table.
+    """
+    # Track progress in bytes, so the dump isn't read an extra time just to count its
+    # lines, and update the bar every 10k rows rather than for each row.
+    with open(filename, mode="rb", buffering=1024 * 1024) as raw, io.TextIOWrapper(
+        raw, encoding="UTF-8", newline=""
+    ) as file, tqdm(
+        total=Path(filename).stat().st_size, unit="B", unit_scale=True
+    ) as pbar:
+        reader = csv.reader(file, delimiter="\t")
+        for count, row in enumerate(reader, 1):
+            if count % 10_000 == 0:
+                pbar.update(raw.tell() - pbar.n)
+            # TODO: Is this 'better' than try/except?
+            if len(row) < 4:
+                continue
+
+            yield row[1:4]
+        pbar.update(raw.tell() - pbar.n)
 
 
 def parse_ia_inlibrary_jsonl(  # noqa: C901
@@ -22,16 +48,16 @@ def parse_ia_inlibrary_jsonl(  # noqa: C901
         - have at most one ISBN 13, after converting all ISBNs to ISBN 13.
 
     """
-    record_total = bufcount(filename)
-    with open(filename, newline="", encoding="UTF-8") as file, tqdm(
-        total=record_total
+    # Track progress in bytes, so the dump isn't read an extra time just to count its
+    # lines, and update the bar every 10k lines rather than for each line.
+    with open(filename, mode="rb", buffering=1024 * 1024) as raw, io.TextIOWrapper(
+        raw, encoding="UTF-8", newline=""
+    ) as file, tqdm(
+        total=Path(filename).stat().st_size, unit="B", unit_scale=True
     ) as pbar:
-        while True:
-            pbar.update(1)
-            line = file.readline()
-            if not line:
-                break
-
+        for count, line in enumerate(file, 1):
+            if count % 10_000 == 0:
+                pbar.update(raw.tell() - pbar.n)
             d: dict[str, str] = orjson.loads(line)
             ol_edition_id = d.get("openlibrary_edition", "")
             isbns = d.get("isbn")
@@ -47,7 +73,7 @@ def parse_ia_inlibrary_jsonl(  # noqa: C901
                 isbn_collection += isbns
 
             # Attempt to deduplicate down to one unique ISBN 13 for IA comparison.
-            isbn_13s = {to_isbn13(isbn) for isbn in isbn_collection}
+            isbn_13s = {isbn_10_to_13(isbn) for isbn in isbn_collection}
             isbn_13s.remove("") if "" in isbn_13s else isbn_13s
             sole_isbn_13 = len(isbn_13s) == 1
             # Except here where we want to track multiple ISBN 13s.
@@ -69,3 +95,4 @@ def parse_ia_inlibrary_jsonl(  # noqa: C901
                 line,
             )
             yield record
+        pbar.update(raw.tell() - pbar.n)
@@ -1,5 +1,4 @@
 import configparser
-import csv
 import logging
 import multiprocessing as mp
 import sqlite3
@@ -13,21 +12,24 @@ from dump_reader import make_chunk_ranges, process_chunk
 from lmdbm import Lmdb
 from openlibrary_editions import (
     insert_ol_cover_data_into_cover_db,
-    insert_ol_data_in_ol_table,
+    insert_ol_rows_from_file,
     pre_create_ol_table_file_cleanup,
-    update_ia_editions_from_parsed_tsvs,
 )
 from openlibrary_works import (
     build_ia_ol_edition_to_ol_work_column,
     copy_db_column,
     create_resolved_edition_work_mapping,
+    load_redirects,
     update_redirected_ids,
 )
 from redirect_resolver import create_redirects_db
 from tqdm import tqdm
-from utils import bufcount, nuller, path_check
+from utils import path_check, threaded_batcher
 
-from reconcile.internet_archive import parse_ia_inlibrary_jsonl
+from reconcile.internet_archive import (
+    parse_ia_inlibrary_jsonl,
+    read_ia_physical_direct_rows,
+)
 from reports import (
     get_broken_ol_ia_backlinks_after_edition_to_work_resolution0,
     get_broken_ol_ia_backlinks_after_edition_to_work_resolution1,
@@ -39,7 +41,6 @@ from reports import (
     get_ia_with_same_ol_edition_id,
     get_ol_edition_has_ocaid_but_no_ia_source_record,
     get_ol_has_ocaid_but_ia_has_no_ol_edition,
-    get_ol_has_ocaid_but_ia_has_no_ol_edition_join,
     query_ol_id_differences,
 )
 
@@ -79,8 +80,7 @@ def create_ia_table(db: Database, ia_dump_path: str = IA_PHYSICAL_DIRECT_DUMP) -
     try:
         db.execute(
             "CREATE TABLE ia (ia_id TEXT, ia_ol_edition_id TEXT, ia_ol_work_id TEXT, \
-            ol_edition_id TEXT, resolved_ia_ol_work_id TEXT, \
-            resolved_ia_ol_work_from_edition TEXT)"
+            resolved_ia_ol_work_id TEXT, resolved_ia_ol_work_from_edition TEXT)"
         )
     except sqlite3.OperationalError as err:
         print(f"SQLite error: {err}")
@@ -94,32 +94,19 @@ def create_ia_table(db: Database, ia_dump_path: str = IA_PHYSICAL_DIRECT_DUMP) -
         print("Either `fetch-data` or check `ia_physical_direct_dump` in setup.cfg")
         typer.Exit(1)
 
-    record_total = bufcount(ia_dump_path)
     print("Inserting the Internet Archive records.")
-    with open(ia_dump_path, newline="", encoding="UTF-8") as file, tqdm(
-        total=record_total
-    ) as pbar:
-        reader = csv.reader(file, delimiter="\t")
-        for row in reader:
-            # TODO: Is this 'better' than try/except?
-            if len(row) < 4:
-                continue
-
-            ia_id, ia_ol_edition_id, ia_ol_work_id = row[1], row[2], row[3]
-
-            # Why is writing empty strings breaking this?
-            db.execute(
-                "INSERT INTO ia VALUES (?, ?, ?, ?, ?, ?)",
-                (
-                    nuller(ia_id),
-                    nuller(ia_ol_edition_id),
-                    nuller(ia_ol_work_id),
-                    None,
-                    None,
-                    None,
-                ),
+    # One explicit transaction for the whole load; it commits on success and rolls
+    # back if the load fails part way. Empty strings become NULL in SQLite via
+    # NULLIF() rather than mapping every field in Python.
+    # The dump is read and batched on a background thread so parsing overlaps with
+    # SQLite inserting the previous batch.
+    with db.connection:
+        for batch in threaded_batcher(read_ia_physical_direct_rows(ia_dump_path), 10_000):
+            db.executemany(
+                "INSERT INTO ia VALUES (NULLIF(?, ''), NULLIF(?, ''), NULLIF(?, ''), \
+                NULL, NULL)",
+                batch,
             )
-            pbar.update(1)
     # Indexing ia_id massively speeds up adding OL records.
     # But doing it first slows inserts.
     db.execute("CREATE INDEX idx_ia_id ON ia(ia_id)")
@@ -192,7 +179,9 @@ def create_ol_table(
     pre_create_ol_table_file_cleanup()
 
     chunks = make_chunk_ranges(filename, size)
-    num_parallel = mp.cpu_count() - 1
+    # Leave a core for the main process, which INSERTs the parsed chunks, but always
+    # run at least one worker.
+    num_parallel = max(1, mp.cpu_count() - 1)
 
     try:
         db.execute(
@@ -206,24 +195,24 @@ def create_ol_table(
         print(f"You may need to delete {SQLITE_DB}.")
         sys.exit(1)
 
-    print("Processing Open Library editions dump and writing to disk.")
+    print("Processing Open Library editions dump and inserting the editions data.")
     print("Note: this progress bar is a little lumpy because of multiprocessing.")
     total_chunks = len(chunks)
-    with mp.Pool(num_parallel) as pool, tqdm(total=total_chunks) as pbar:
+    with mp.Pool(num_parallel) as pool, tqdm(total=total_chunks) as pbar, db.connection:
+        # INSERT each chunk's editions as soon as a worker finishes parsing it, while
+        # the freshly written file is still in the page cache, rather than re-reading
+        # every parsed file from disk once all the parsing is done. All chunks go in
+        # one explicit transaction.
         result = pool.imap_unordered(process_chunk, chunks)
-        for _ in result:
+        for edition_file in result:
+            insert_ol_rows_from_file(db, edition_file)
             pbar.update(1)
 
-    print("Inserting the Open Library editions data.")
-    insert_ol_data_in_ol_table(db)
-
     # Create the index after INSERT for performance gain.
     db.execute("CREATE INDEX idx_ol_edition ON ol(ol_edition_id)")
     db.execute("CREATE INDEX idx_ol_work ON ol(ol_work_id)")
-
-    print("Now updating the Internet Archive table with Open Library data.")
-    print("This shouldn't take as long.")
-    update_ia_editions_from_parsed_tsvs(db)
+    # The reports join ia to ol on the OCAID rather than copying ol_edition_id onto ia.
+    db.execute("CREATE INDEX idx_ol_ocaid ON ol(ol_ocaid)")
 
     db.commit()
 
@@ -232,9 +221,19 @@ def create_ol_table(
 def create_db() -> None:
     """Create the tables and insert the data. NOTE: You must fetch the data first."""
     db = Database()
-    create_ia_table(db)
-    create_ia_jsonl_table(db)
-    create_ol_table(db)
+    # Larger pages suit this mostly-scanned analytics database. The page size can only
+    # be set before the first table is created.
+    db.execute("PRAGMA page_size = 32768")
+    db.set_bulk_load_pragmas()
+    try:
+        create_ia_table(db)
+        create_ia_jsonl_table(db)
+        create_ol_table(db)
+        # Gather index statistics so the planner picks good joins for the reports.
+        db.execute("ANALYZE")
+        db.commit()
+    finally:
+        db.set_default_pragmas()
 
 
 @app.command()
@@ -247,11 +246,9 @@ def all_reports() -> None:
         print("\n")
         get_editions_with_multiple_works(db)
         print("\n")
-        get_ol_has_ocaid_but_ia_has_no_ol_edition(db)
-        print("\n")
         get_ol_edition_has_ocaid_but_no_ia_source_record(db)
         print("\nThe next queries use joins and are slower.\n")
-        get_ol_has_ocaid_but_ia_has_no_ol_edition_join(db)
+        get_ol_has_ocaid_but_ia_has_no_ol_edition(db)
         print("\n")
         get_ia_links_to_ol_but_ol_edition_has_no_ocaid(db)
         print("\n")
@@ -302,10 +299,11 @@ def resolve_redirects() -> None:
     db.commit()
 
     print("Resolving the redirects so there are consistent ID references.")
+    redirects = load_redirects(redirect_db)
     update_redirected_ids(
-        db, "ia", "ia_ol_work_id", "resolved_ia_ol_work_id", redirect_db
+        db, "ia", "ia_ol_work_id", "resolved_ia_ol_work_id", redirects
     )
-    update_redirected_ids(db, "ol", "ol_work_id", "resolved_ol_work_id", redirect_db)
+    update_redirected_ids(db, "ol", "ol_work_id", "resolved_ol_work_id", redirects)
     db.commit()
 
     print("Creating the edition -> work mapping")
@@ -320,7 +318,11 @@ def resolve_redirects() -> None:
 @app.command()
 def create_cover_db() -> None:
     db = Database("./bwb-cover-bot.sqlite")
-    insert_ol_cover_data_into_cover_db(db)
+    db.set_bulk_load_pragmas()
+    try:
+        insert_ol_cover_data_into_cover_db(db)
+    finally:
+        db.set_default_pragmas()
 
 
 @app.callback()
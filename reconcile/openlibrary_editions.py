@@ -6,21 +6,22 @@ import configparser
 import mmap
 import sqlite3
 import sys
-from collections.abc import Iterator, Sequence
+from collections.abc import Iterator
+from itertools import chain
 from pathlib import Path
 from typing import Any
 
 import orjson
 from database import Database
-from isbnlib import to_isbn13
 from tqdm import tqdm
 
 from reconcile.datatypes import ParsedEdition
 from reconcile.utils import (
-    bufcount,
+    batcher,
     get_bad_isbn_10s,
     get_bad_isbn_13s,
-    nuller,
+    isbn_10_to_13,
+    mmap_lines,
     record_errors,
 )
 
@@ -41,6 +42,12 @@ SCRUB_DATA = config.getboolean(CONF_SECTION, "scrub_data")
 
 db = Database(SQLITE_DB)
 
+# The VALUES of one ol row, and how many rows each INSERT holds. SQLite before 3.32
+# allows at most 999 bound parameters per statement, so fill each INSERT up to that.
+OL_ROW_VALUES = "(NULLIF(?, ''), NULLIF(?, ''), NULLIF(?, ''), NULLIF(?, ''), \
+NULLIF(?, ''), NULLIF(?, ''), NULLIF(?, ''), '', '')"
+OL_INSERT_BATCH_SIZE = 999 // OL_ROW_VALUES.count("?")
+
 
 def pre_create_ol_table_file_cleanup() -> None:
     """Clean up stale files."""
@@ -57,13 +64,13 @@ def pre_create_ol_table_file_cleanup() -> None:
             p.unlink()
 
 
-def process_edition_line(row: list[str]) -> ParsedEdition:  # noqa: C901
+def process_edition_line(row: list[Any]) -> ParsedEdition:  # noqa: C901
     """
     For each decoded line in the editions dump, process it to get values for insertion
     into the database.
 
-    Input:
-    ['/type/edition', '/books/OL10000149M', '2', '2010-03-11T23:51:36.723486', '{JSON}']
+    Input, with the JSON as bytes as read_chunk_lines() leaves it:
+    ['/type/edition', '/books/OL10000149M', '2', '2010-03-11T23:51:36.723486', b'{JSON}']
     """
     # Annotate some variables to make this a bit cleaner. Maybe
     ol_edition_id: str
@@ -75,19 +82,25 @@ def process_edition_line(row: list[str]) -> ParsedEdition:  # noqa: C901
     d: dict[str, Any] = orjson.loads(row[4])
 
     ol_ocaid = d.get("ocaid", None)
-    ol_edition_id = d.get("key", "").split("/")[-1]
+    ol_edition_id = d.get("key", "").rpartition("/")[2]
     isbn_10s: list[str] = d.get("isbn_10", None)
     isbn_13s: list[str] = d.get("isbn_13", None)
 
     if work_id := d.get("works"):
-        ol_work_id = work_id[0].get("key", "").split("/")[-1]
-        has_multiple_works = int(len(work_id) > 1)
-
-    if (source_records := d.get("source_records")) and isinstance(source_records, list):
-        # Check if each record has an "ia:" in it. If any does, return True
+        ol_work_id = work_id[0].get("key", "").rpartition("/")[2]
+        has_multiple_works = 1 if work_id[1:] else 0
+
+    # Most editions have no "ia:" anywhere in their JSON, so check the raw line first
+    # and only walk source_records when it might hold an IA record.
+    if (
+        b"ia:" in row[4]
+        and (source_records := d.get("source_records"))
+        and isinstance(source_records, list)
+    ):
+        # Check if each record starts with "ia:". If any does, return True
         # and convert to 1 for SQLite, and 0 otherwise.
         has_ia_source_record = int(
-            any(["ia" in record for record in source_records if record is not None])
+            any(record.startswith("ia:") for record in source_records if record)
         )
 
     # Check and report bad ISBNs.
@@ -110,7 +123,7 @@ def process_edition_line(row: list[str]) -> ParsedEdition:  # noqa: C901
 
     # Attempt to get one ISBN for comparison with Internet Archive items.
     isbns = set(isbn_13s or {})
-    isbns.update({to_isbn13(isbn) for isbn in isbn_10s or {}})
+    isbns.update({isbn_10_to_13(isbn) for isbn in isbn_10s or {}})
     # With every ISBN as ISBN 13 and deduplicated, save them all for BWBCoverBot.
     isbn_13s_for_covers = ",".join(isbns)
     try:
@@ -130,55 +143,50 @@ def process_edition_line(row: list[str]) -> ParsedEdition:  # noqa: C901
     )
 
 
-def insert_ol_data_in_ol_table(
-    db: Database, filename: str = OL_DUMP_PARSED_PREFIX
-) -> None:
+def read_ol_rows(file: Path) -> Iterator[list[str]]:
     """
-    Read the parsed Open Library edition TSVs and INSERT the contents into the ol table
-    of {db}. {filename} is the base filename without the hex string that
-    write_chunk_to_disk() adds.
+    Read the parsed Open Library editions TSV at {file}, and yield the decoded ol table
+    columns from each line.
+    Format of decoded line, formatted by ParsedEdition.to_tsv_line():
+    edition_id, work_id, ocaid, isbn_13, has_multiple_works, has_ia_source_record, has_cover
+    e.g. OL12459902M OL9945028W  mafamillemitterr0000cahi  1234567890123  0  1  1
+
+    Returns the same data as a list of strings. Empty strings are left for the INSERT
+    to turn into NULL.
+    ["OL12459902M", "OL9945028W", "mafamillemitterr0000cahi", "1234567890123", "0", "1", "1"]
     """
-    path = Path(filename)
-
-    files = list(Path(FILES_DIR).glob(f"{path.stem}_edition_*{path.suffix}"))
-    lines = [bufcount(f) for f in files]
-    total = sum(lines)
-
-    def get_ol_rows() -> Iterator[Sequence[str | None]]:
-        """
-        Read {filename} in TSV format, decode the lines, and yield them.
-        Format of decoded line, formatted by ParsedEdition.to_list():
-        edition_id, work_id, ocaid, isbn_13, has_multiple_works, has_ia_source_record, has_cover isbn_13s
-        e.g. OL12459902M OL9945028W  mafamillemitterr0000cahi  1234567890123  0  1  1 ""
-
-        Returns the same data as a list, but everything is a string (or None).
-        ["OL12459902M", "OL9945028W", "mafamillemitterr0000cahi", "1234567890123", "0", "1", "1", ""]
-        """
-        pbar = tqdm(total=total)
-        for file in files:
-            with file.open(mode="r+b") as fp:
-                mm = mmap.mmap(fp.fileno(), 0)
-                for line in iter(mm.readline, b""):
-                    row = line.decode("utf-8").split("\t")
-                    # Because another function reads isbn_13s, we can pop the index of it as
-                    # it is not needed here and doesn't go into the database.
-                    row.pop()
-                    # Convert empty strings to None because in CSV None is stored as "".
-                    nulled_row = [nuller(column) for column in row]
-                    pbar.update(1)
-                    if len(nulled_row) != 7:
-                        record_errors(nulled_row, REPORT_ERRORS)
-                        continue
-                    nulled_row += (
-                        "",
-                        "",
-                    )  # Faster append of to-be-used columns.
-                    yield nulled_row
+    # A chunk with no edition lines writes an empty file, and an empty file can't be
+    # mapped.
+    if not file.stat().st_size:
+        return
+
+    with file.open(mode="rb") as fp, mmap.mmap(
+        fp.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mm:
+        # The file is read front to back once, so let the kernel read ahead.
+        if hasattr(mmap, "MADV_SEQUENTIAL"):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        for line in mmap_lines(mm):
+            row = line.decode("utf-8").split("\t")
+            if len(row) != 7:
+                record_errors(row, REPORT_ERRORS)
+                continue
+            yield row
+
+
+def insert_ol_rows_from_file(db: Database, file: Path) -> None:
+    """
+    INSERT the rows of a single parsed Open Library editions TSV, {file}, into the ol
+    table of {db}. Does not commit.
 
-    collection = get_ol_rows()
-    db.execute("PRAGMA synchronous = OFF")
-    db.executemany("INSERT INTO ol VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", collection)
-    db.commit()
+    Rows go in {OL_INSERT_BATCH_SIZE} at a time as one multi-row INSERT, which binds
+    faster than executemany() does row by row. The TSVs store None as "", so NULLIF()
+    turns empty strings back into NULL inside SQLite rather than mapping every field
+    in Python. The two resolved_* columns are filled in later.
+    """
+    for batch in batcher(read_ol_rows(file), OL_INSERT_BATCH_SIZE):
+        values = ", ".join([OL_ROW_VALUES] * len(batch))
+        db.execute(f"INSERT INTO ol VALUES {values}", tuple(chain.from_iterable(batch)))
 
 
 def insert_ol_cover_data_into_cover_db(  # noqa: C901
@@ -201,77 +209,45 @@ def insert_ol_cover_data_into_cover_db(  # noqa: C901
 
     path = Path(filename)
 
-    files = list(Path(FILES_DIR).glob(f"{path.stem}_edition_*{path.suffix}"))
-    lines = [bufcount(f) for f in files]
-    total = sum(lines)
+    files = list(Path(FILES_DIR).glob(f"{path.stem}_cover_*{path.suffix}"))
+    # Track progress in bytes so the files aren't read an extra time just to count
+    # their lines.
+    total = sum(f.stat().st_size for f in files)
 
     def get_ol_rows() -> Iterator[tuple[str, int]]:
         """
-        For each ParsedEdition written to the CSV files this reads, check if has_isbn = 1, and
-        if it is, process the string of ISBNs that corresponds to ParsedEdition.isbn_13s,
-        returning a tuple of (isbn13, 1), corresponding to isbn_13, and cover_exists in the DB.
+        Read the covers files, which hold the comma separated ParsedEdition.isbn_13s of
+        each edition with a cover, returning a tuple of (isbn13, 1), corresponding to
+        isbn_13, and cover_exists in the DB.
         """
-        pbar = tqdm(total=total)
+        pbar = tqdm(total=total, unit="B", unit_scale=True)
         for file in files:
-            with file.open(mode="r+b") as fp:
-                mm = mmap.mmap(fp.fileno(), 0)
-                for line in iter(mm.readline, b""):
-                    pbar.update(1)
-                    row = line.decode("utf-8").split("\t")
-                    # Check for has_cover
-                    if row[6] != "1":
-                        continue
-
-                    try:
-                        isbns = row[7].split(",")  # Unpack possible multiple ISBN 13s.
-
-                        for isbn in isbns:
-                            isbn = isbn.strip()
-                            if isbn:
-                                yield (isbn, 1)
-                    except IndexError:
-                        continue
+            # Editions without ISBN 13s write no line, so a chunk's file may be empty,
+            # and an empty file can't be mapped.
+            if not file.stat().st_size:
+                continue
+            with file.open(mode="rb") as fp, mmap.mmap(
+                fp.fileno(), 0, access=mmap.ACCESS_READ
+            ) as mm:
+                if hasattr(mmap, "MADV_SEQUENTIAL"):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                # Update the progress bar every 10k lines rather than for each line.
+                read = 0
+                for count, line in enumerate(mmap_lines(mm), 1):
+                    read += len(line) + 1  # Plus the newline.
+                    if count % 10_000 == 0:
+                        pbar.update(read)
+                        read = 0
+
+                    # Unpack possible multiple ISBN 13s.
+                    isbns = line.decode("utf-8").split(",")
+                    for isbn in isbns:
+                        isbn = isbn.strip()
+                        if isbn:
+                            yield (isbn, 1)
+                pbar.update(read)
 
     collection = get_ol_rows()
-    db.execute("PRAGMA synchronous=0")
-    db.execute("PRAGMA journal_mode=wal")
-    db.executemany("INSERT OR IGNORE INTO EditionCoverData VALUES (?, ?)", collection)
-    db.commit()
-
-
-def update_ia_editions_from_parsed_tsvs(
-    db: Database, filename: str = OL_DUMP_PARSED_PREFIX
-) -> None:
-    """
-    Read the parsed Open Library editions TSV from {filename} and use the parsed data to
-    UPDATE the ia table with the ol_edition_id, based on an ocaid being present on both
-    sides. This is to quickly compare the ia_ol_edition_id and ol_edition_id.
-
-    There is glob matching between the filename stem and suffix.
-    """
-    path = Path(filename)
-
-    files = list(Path(FILES_DIR).glob(f"{path.stem}_edition_*{path.suffix}"))
-    lines = [bufcount(f) for f in files]
-    total = sum(lines)
-
-    def get_ol_ia_pairs() -> Iterator[tuple[str, str]]:
-        """
-        From the parsed OL data, find edition_id and ocaid pairs.
-        Format is:
-        edition_id, work_id, ocaid, isbn_13, has_multiple_works, has_ia_source_record
-        e.g. OL12459902M OL9945028W  mafamillemitterr0000cahi  012345678X  0  1
-        """
-        pbar = tqdm(total=total)
-        for file in files:
-            with file.open(mode="r+b") as fp:
-                mm = mmap.mmap(fp.fileno(), 0)
-                for line in iter(mm.readline, b""):
-                    row = line.decode("utf-8").split("\t")
-                    pbar.update(1)
-                    if row[0] and row[2]:
-                        yield (row[0], row[2])
-
-    collection = get_ol_ia_pairs()
-    db.executemany("UPDATE ia SET ol_edition_id = ? WHERE ia_id = ?", collection)
-    db.commit()
+    db.executemany_batched(
+        "INSERT OR IGNORE INTO EditionCoverData VALUES (?, ?)", collection
+    )
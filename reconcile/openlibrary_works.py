@@ -1,11 +1,9 @@
 """
 Functions for working with Open Library works.
 """
-import csv
 import logging
-import tempfile
-from collections.abc import Iterator
-from typing import IO, cast
+from collections.abc import Iterable, Iterator
+from typing import Protocol
 
 from database import Database
 from lmdbm import Lmdb
@@ -14,6 +12,23 @@ from utils import batcher
 
 logger = logging.getLogger(__name__)
 
+# The redirect resolution caches are cleared once they reach this many IDs, so they
+# can't grow with the size of a table.
+RESOLVE_CACHE_SIZE = 1_000_000
+# Redirect stores with up to this many redirects are read into a dict before resolving
+# IDs. That's several hundred MB at the limit.
+REDIRECT_PRELOAD_LIMIT = 5_000_000
+
+
+class BytesLookup(Protocol):
+    """
+    A store that get() reads bytes values from by bytes key, e.g. an Lmdb store or
+    a read transaction on one.
+    """
+
+    def get(self, key: bytes) -> bytes | None:
+        ...
+
 
 def copy_db_column(db: Database, table: str, from_column: str, to_column: str) -> None:
     """Copy {from_column} to {to_column} on {table} in {db}."""
@@ -21,12 +36,50 @@ def copy_db_column(db: Database, table: str, from_column: str, to_column: str) -
     db.commit()
 
 
+def load_redirects(redirect_db: Lmdb) -> Lmdb | dict[str, bytes]:
+    """
+    Return the redirects in {redirect_db} as a dict if there are few enough of them to
+    hold in memory, so following a chain doesn't go to LMDB for every link. Otherwise
+    return {redirect_db} itself. Like Lmdb.get(), the dict's values are bytes.
+    """
+    if len(redirect_db) > REDIRECT_PRELOAD_LIMIT:
+        return redirect_db
+    return {key.decode(): value for key, value in redirect_db.items()}
+
+
+def _resolve(
+    original_id: str, redirect_db: Lmdb | dict[str, bytes], resolved: dict[str, str]
+) -> tuple[str, list[str]]:
+    """
+    Follow the redirects in {redirect_db} from {original_id} until an ID has no value,
+    or until an ID already in {resolved} is reached. Return that final ID and the IDs
+    that redirect to it along the way.
+    """
+    current_id = original_id
+
+    # Hold intermediate destination IDs to later pair with the final destination ID so
+    # each link of the chain points to the final destination ID.
+    intermediate_ids: list[str] = []
+
+    while current_id not in resolved:
+        redirected_id = redirect_db.get(current_id)
+        if not redirected_id:
+            return current_id, intermediate_ids
+
+        # Add intermediate ID to our list for later processing and check if this
+        # intermediate ID is redirected again.
+        intermediate_ids.append(current_id)
+        current_id = redirected_id.decode()  # decode bytes from LMDB
+
+    return resolved[current_id], intermediate_ids
+
+
 def get_id_update_pairs(
-    unchecked_ids_fp: IO[str], redirect_db: Lmdb
+    unchecked_ids: Iterable[tuple[str | None]], redirect_db: Lmdb | dict[str, bytes]
 ) -> Iterator[tuple[str, str]]:
     """
-    Read the file at {unchecked_ids_fp} and iterate through to return a tuple of an Open
-    Library ID and its final redirected ID.
+    Iterate through {unchecked_ids}, rows of one Open Library ID, to return a tuple of
+    an Open Library ID and its final redirected ID.
 
     This is done by done by querying {redirect_db}, which contains all the
     (from -> to) pairings for redirects.
@@ -35,37 +88,61 @@ def get_id_update_pairs(
     further redirect. Repeat until the key has no value. That key is our final
     destination ID.
 
-    Input: a one column TSV with Open Library IDs.
+    IDs repeat (e.g. a work ID on each of its editions), and chains share intermediate
+    IDs, so resolved IDs are cached. An ID already in the cache has had its pairs
+    yielded, and a chain reaching a cached ID stops there.
+
+    Input: one column rows of Open Library IDs, e.g. a cursor from the db query.
     Returns a tuple: (original_id, final_destination_id)
     """
-    reader = csv.reader(unchecked_ids_fp, delimiter="\t")
-    # fp is open and the stream position is on the last written line.
-    unchecked_ids_fp.seek(0)
+    resolved: dict[str, str] = {}
     # Check if each ID needs updating.
-    for (original_id,) in tqdm(reader):  # Unpack the tuple from the db query
-        if original_id is None or original_id == "":
+    for (original_id,) in tqdm(unchecked_ids):  # Unpack the tuple from the db query
+        if not original_id or original_id in resolved:
             continue
-        current_id: str = original_id
 
-        # Hold intermediate destination IDs to later pair with the final destination
-        # ID so each link of the chain points to the final destination ID.
-        intermediate_ids: list[str] = []
+        final_id, intermediate_ids = _resolve(original_id, redirect_db, resolved)
 
-        # Look for redirected ids.
-        while True:
-            redirected_id = redirect_db.get(current_id)
-            if not redirected_id:
-                # Update the final_id in case this is the final redirect ID.
-                final_id = current_id
-                break
+        if len(resolved) >= RESOLVE_CACHE_SIZE:
+            resolved.clear()
+        resolved[original_id] = final_id
+        for intermediate_id in intermediate_ids:
+            resolved[intermediate_id] = final_id
+            yield (final_id, intermediate_id)
 
-            # Add intermediate ID to our list for later processing and check if this
-            # intermediate ID is redirected again.
-            intermediate_ids += (current_id,)
-            current_id = redirected_id.decode()  # decode bytes from LMDB
 
-        duos = [(final_id, intermediate_id) for intermediate_id in intermediate_ids]
-        yield from duos
+def update_column_from_pairs(
+    db: Database,
+    table: str,
+    write_column: str,
+    key_column: str,
+    pairs: Iterable[tuple[str, str]],
+) -> None:
+    """
+    For each (value, key) in {pairs}, set {write_column} of {table} to value on the rows
+    where {key_column} is key.
+
+    The pairs are loaded into a temp table first so that {table} is updated by one
+    UPDATE, rather than one UPDATE statement per pair. The UPDATE looks each key up in
+    the temp table with a subquery rather than using UPDATE ... FROM, which needs
+    SQLite 3.33.
+    """
+    with db.connection:
+        db.execute("DROP TABLE IF EXISTS temp.column_updates")
+        db.execute(
+            "CREATE TEMP TABLE column_updates (key TEXT PRIMARY KEY, value TEXT) \
+            WITHOUT ROWID"
+        )
+        db.executemany(
+            "INSERT OR REPLACE INTO column_updates VALUES (?, ?)",
+            ((key, value) for value, key in pairs),
+        )
+        db.execute(
+            f"UPDATE {table} SET {write_column} = (SELECT value FROM column_updates \
+            WHERE column_updates.key = {table}.{key_column}) \
+            WHERE {key_column} IN (SELECT key FROM column_updates)"
+        )
+        db.execute("DROP TABLE temp.column_updates")
 
 
 def update_redirected_ids(
@@ -73,7 +150,7 @@ def update_redirected_ids(
     table: str,
     read_column: str,
     write_column: str,
-    redirect_db: Lmdb,
+    redirect_db: Lmdb | dict[str, bytes],
 ) -> None:
     """
     Get the most recent Open Library IDs for the IDs in a database column and write them
@@ -81,26 +158,18 @@ def update_redirected_ids(
 
     Query {read_column} of {db} to get the IDs that need redirects resolved, then for
     each of them, query {redirect_db} to resolve its redirects to a final ID if needed.
+    When resolving several columns, read the redirects once with load_redirects() and
+    pass the result as {redirect_db} to each call.
 
     This exists to create a consistent set of IDs to use when comparing backlinks,
     because without a consistent set of IDs, both IA and OL may refer to the same work
     or edition or work, but because of merges, the IDs appear inconsistent.
     """
     sql = f"SELECT {read_column} FROM {table}"
-    # Use a temp file to store the query results. Iterating on the db cursor while
-    # updating was slow. Both ways avoid memory exhaustion.
-    with tempfile.TemporaryFile(mode="w+") as fp:
-        writer = csv.writer(fp, delimiter="\t")
-        db.execute(sql)
-        for row in db.cursor:
-            writer.writerow(row)
-
-        collection = get_id_update_pairs(fp, redirect_db)
-        db.executemany(
-            f"UPDATE {table} SET {write_column} = ? WHERE {read_column} IS ?",
-            collection,
-        )
-        db.commit()
+    # The pairs are streamed from the query into a temp table, and {table} is only
+    # updated once the query is done, so the query can be read directly.
+    collection = get_id_update_pairs(db.query_iter(sql), redirect_db)
+    update_column_from_pairs(db, table, write_column, read_column, collection)
 
 
 def create_resolved_edition_work_mapping(db: Database, map_db: Lmdb) -> None:
@@ -116,60 +185,74 @@ def create_resolved_edition_work_mapping(db: Database, map_db: Lmdb) -> None:
            AND resolved_ol_work_id IS NOT NULL
     """
     # Iterate on the cursor because db.query() does fetchall() and that may exhaust RAM.
-    db.execute(sql)
-    edition_work_pairs = iter(tqdm(db.cursor))
-    batches = batcher(edition_work_pairs, 5000)
+    edition_work_pairs = iter(tqdm(db.query_iter(sql)))
+    # Each update() is its own LMDB write transaction, so use large batches to keep
+    # the number of commits down; lmdbm grows the map between batches as needed.
+    # Sorting a batch by edition ID lets LMDB write it in key order.
+    batches = batcher(edition_work_pairs, 50_000)
 
     for batch in batches:
-        map_db.update(batch)
+        map_db.update(sorted(batch))
 
 
 def get_resolved_work_from_edition(
-    redirect_db: Lmdb, map_db: Lmdb, edition_id: str
+    redirect_db: BytesLookup,
+    map_db: BytesLookup,
+    edition_id: str,
+    cache: dict[str, bytes] | None = None,
 ) -> str:
     """
     Get the fully resolved work corresponding to an arbitrary {edition_id}. If a work is
     not found, a KeyError is raised.
 
     Uses {redirect_db} to to resolve the edition ID before using {map_db} to look up
-    the fully resolved edition->work mapping.
+    the fully resolved edition->work mapping. Either can also be a read transaction on
+    the store, which saves beginning a transaction for every lookup. If given, {cache}
+    holds the resolved edition IDs across calls.
+
+    The IDs are kept as the bytes LMDB stores until the work ID is returned, so they
+    aren't encoded for and decoded from LMDB at every step of a redirect chain.
     """
-    current_id = edition_id
-    while True:
-        redirected_id: str = redirect_db.get(current_id, None)
-        if not redirected_id:
-            final_id = current_id
-            break
-        current_id = redirected_id
+    if cache is not None and edition_id in cache:
+        final_id = cache[edition_id]
+    else:
+        get_redirect = redirect_db.get
+        final_id = edition_id.encode()
+        while redirected_id := get_redirect(final_id):
+            final_id = redirected_id
+
+        if cache is not None:
+            if len(cache) >= RESOLVE_CACHE_SIZE:
+                cache.clear()
+            cache[edition_id] = final_id
 
     if work_id := map_db.get(final_id):
-        return cast(str, work_id.decode())
+        return work_id.decode()
     raise KeyError
 
 
 def get_ocaid_and_resolved_ia_work_from_edition(
-    redirect_db: Lmdb,
-    map_db: Lmdb,
-    fp: IO[str],
+    redirect_db: BytesLookup,
+    map_db: BytesLookup,
+    rows: Iterable[tuple[str, str]],
 ) -> Iterator[tuple[str, str]]:
     """
     Returns (ocaid, resolved_ia_work_from_edition) pairs.
 
-    Reads {fp}, a temp file, to get tab-delimited ocaid, ol_edition_id pairs, and the
-    ol_edition_id is turned into a fully resolved ol_work_id. {redirect_db} has all the
-    redirects, and {map_db} holds the map of editions to works.
+    Reads {rows} of ocaid, ol_edition_id pairs, e.g. a cursor from the db query, and
+    the ol_edition_id is turned into a fully resolved ol_work_id. {redirect_db} has all
+    the redirects, and {map_db} holds the map of editions to works.
     """
-    reader = csv.reader(fp, delimiter="\t")
-    fp.seek(0)  # fp is open and the stream position is on the last written line.
+    resolved: dict[str, bytes] = {}
 
-    for ocaid, edition in tqdm(reader):
+    for ocaid, edition in tqdm(rows):
         if not edition:
             logging.warning(f"No edition found for IA OCAID {ocaid}")
             continue
 
         try:
             if resolved_work := get_resolved_work_from_edition(
-                redirect_db, map_db, edition
+                redirect_db, map_db, edition, resolved
             ):
                 yield (resolved_work, ocaid)
         except KeyError:
@@ -199,19 +282,14 @@ def build_ia_ol_edition_to_ol_work_column(
     WHERE  ia_ol_edition_id IS NOT NULL
     """
 
-    # Use a temp file to store the query results. Iterating on the db cursor while
-    # updating was slow. Both ways avoid memory exhaustion.
-    with tempfile.TemporaryFile(mode="w+") as fp:
-        writer = csv.writer(fp, delimiter="\t")
-        db.execute(sql)
-        for row in db.cursor:
-            writer.writerow(row)
-
+    # The pairs are streamed from the query into a temp table, and ia is only updated
+    # once the query is done, so the query can be read directly.
+    # Each Lmdb.get() begins and ends its own read transaction, so use one read
+    # transaction per store for the whole pass instead.
+    with redirect_db.env.begin() as redirect_txn, map_db.env.begin() as map_txn:
         collection = get_ocaid_and_resolved_ia_work_from_edition(
-            redirect_db, map_db, fp
+            redirect_txn, map_txn, db.query_iter(sql)
         )
-        db.executemany(
-            "UPDATE ia SET resolved_ia_ol_work_from_edition = ? WHERE ia_id = ?",
-            collection,
+        update_column_from_pairs(
+            db, "ia", "resolved_ia_ol_work_from_edition", "ia_id", collection
         )
-        db.commit()
@@ -1,12 +1,14 @@
 import configparser
 import mmap
+import re
 import sys
-from collections.abc import Generator, Iterator
+from collections.abc import Iterator
 from pathlib import Path
+from typing import Any
 
 import orjson
 from lmdbm import Lmdb
-from utils import batcher
+from utils import batcher, mmap_lines
 
 from reconcile.datatypes import ParsedRedirect
 
@@ -20,27 +22,36 @@ config.read("setup.cfg")
 CONF_SECTION = "reconcile-test" if "pytest" in sys.modules else "reconcile"
 FILES_DIR = config.get(CONF_SECTION, "files_dir")
 
+# Matches a redirect's location, e.g. "location": "/books/OL002M", when it has no
+# escaped characters.
+LOCATION_PATTERN = re.compile(rb'"location":\s*"([^"\\]*)"')
 
-def process_redirect_line(line: list[str]) -> ParsedRedirect | None:
+
+def process_redirect_line(line: list[Any]) -> ParsedRedirect | None:
     """
     Read a line of the full dump and pull out the redirect keys and values for use in
     making a key-value store of redirects.
     Takes:
-    ['/type/redirect', '/books/OL001M', '3', '<datetimestr>, '{JSON}\n']
-    ['/type/redirect', '/books/OL001M', '3', '2010-04-14T02:53:24.620268', '{"created": {"type": "/type/datetime", "value": "2008-04-01T03:28:50.625462"}, "covers": [5685889], "last_modified": {"type": "/type/datetime", "value": "2010-04-14T02:53:24.620268"}, "latest_revision": 3, "location": "/books/OL002M", "key": "/books/OL001M", "type": {"key": "/type/redirect"}, "revision": 3}\n']  # noqa E501
+    ['/type/redirect', '/books/OL001M', '3', '<datetimestr>, b'{JSON}\n']
+    ['/type/redirect', '/books/OL001M', '3', '2010-04-14T02:53:24.620268', b'{"created": {"type": "/type/datetime", "value": "2008-04-01T03:28:50.625462"}, "covers": [5685889], "last_modified": {"type": "/type/datetime", "value": "2010-04-14T02:53:24.620268"}, "latest_revision": 3, "location": "/books/OL002M", "key": "/books/OL001M", "type": {"key": "/type/redirect"}, "revision": 3}\n']  # noqa E501
 
     Returns tuple pairs of either edition or work redirects, where the first item is
     the redirector_id, and the second item is the destination_id.
     ("OL001M", "OL002M")
     """
-    origin_id = line[1].split("/")[-1]
+    origin_id = line[1].rpartition("/")[2]
 
     # Only process editions and works.
     if not origin_id.endswith(("W", "M")):
         return None
 
-    d = orjson.loads(line[4])
-    destination_id = d.get("location", "").split("/")[-1]
+    # Redirects carry little else, so pull "location" straight out of the raw JSON
+    # bytes and only parse the JSON if it can't be found that way.
+    if match := LOCATION_PATTERN.search(line[4]):
+        location = match.group(1).decode("utf-8")
+    else:
+        location = orjson.loads(line[4]).get("location", "")
+    destination_id = location.rpartition("/")[2]
     return ParsedRedirect(origin_id=origin_id, destination_id=destination_id)
 
 
@@ -59,18 +70,30 @@ def create_redirects_db(dict_db: Lmdb, base_filename: str) -> None:
     files = Path(FILES_DIR).glob(f"{path.stem}_redirect_*{path.suffix}")
 
     def get_redirects_from_disk(
-        files: Generator[Path, None, None]
-    ) -> Iterator[tuple[str, str]]:
-        """Read from disk, process, create generator for use in batching."""
+        files: Iterator[Path],
+    ) -> Iterator[tuple[bytes, bytes]]:
+        """
+        Read from disk, process, create generator for use in batching. The IDs are left
+        as bytes, which is what LMDB stores, so they're never decoded and re-encoded.
+        """
         for file in files:
-            with file.open(mode="r+b") as fp:
-                mm = mmap.mmap(fp.fileno(), 0)
-                for line in iter(mm.readline, b""):
-                    original_id, redirected_id = line.decode("utf-8").split("\t")
+            # A chunk without redirects writes an empty file, which can't be mapped.
+            if not file.stat().st_size:
+                continue
+            with file.open(mode="rb") as fp, mmap.mmap(
+                fp.fileno(), 0, access=mmap.ACCESS_READ
+            ) as mm:
+                # Each file is read front to back once, so let the kernel read ahead.
+                if hasattr(mmap, "MADV_SEQUENTIAL"):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                for line in mmap_lines(mm):
+                    original_id, redirected_id = line.split(b"\t")
                     yield (original_id.strip(), redirected_id.strip())
 
     redirects = get_redirects_from_disk(files)
-    batches = batcher(redirects, 5000)
+    # Each update() is its own LMDB write transaction, so use large batches to keep
+    # the number of commits down. lmdbm grows the map between batches as needed.
+    batches = batcher(redirects, 100_000)
 
     for batch in batches:
         dict_db.update(batch)
@@ -1,7 +1,6 @@
 # from main import process_result
 import configparser
 import sys
-from typing import Any
 
 from database import Database
 from utils import query_output_writer
@@ -16,9 +15,6 @@ REPORT_OL_IA_BACKLINKS = config.get(CONF_SECTION, "report_ol_ia_backlinks")
 REPORT_OL_HAS_OCAID_IA_HAS_NO_OL_EDITION = config.get(
     CONF_SECTION, "report_ol_has_ocaid_ia_has_no_ol_edition"
 )
-REPORT_OL_HAS_OCAID_IA_HAS_NO_OL_EDITION_JOIN = config.get(
-    CONF_SECTION, "report_ol_has_ocaid_ia_has_no_ol_edition_join"
-)
 REPORT_EDITIONS_WITH_MULTIPLE_WORKS = config.get(
     CONF_SECTION, "report_edition_with_multiple_works"
 )
@@ -48,17 +44,17 @@ REPORT_BROKEN_OL_IA_BACKLINKS_AFTER_EDITION_TO_WORK_RESOLUTION1 = config.get(
 )
 
 
-def process_result(result: list[Any], out_file: str, message: str) -> None:
+def process_result(db: Database, sql: str, out_file: str, message: str) -> None:
     """
     Template to reduce repetition in processing the query results.
 
-    :param list result: query output
+    :param Database db: an instance of the database.py class.
+    :param str sql: the report query, as returned by one of the db.get_*_sql() methods
     :param str out_file: filename into which to write the query output
     :param str message: description of the query result
     """
-    count = len(result)
-    dedupe_count = len(set(result))
-    query_output_writer(result, out_file)
+    rows = db.query_iter_flag_duplicates(sql)
+    count, dedupe_count = query_output_writer(rows, out_file)
     print(f"{message}: {count:,}")
     print(f"De-duplicated count: {dedupe_count:,}")
     print(f"Results written to {out_file}")
@@ -82,8 +78,8 @@ def query_ol_id_differences(
 
     # Get the results, count them, and write the results to a TSV.
     message = "Total (ostensibly) broken back-links to Open Library"
-    result = db.get_ol_ia_id_differences()
-    process_result(result, out_file, message)
+    sql = db.get_ol_ia_id_differences_sql()
+    process_result(db, sql, out_file, message)
 
 
 def get_ol_has_ocaid_but_ia_has_no_ol_edition(
@@ -98,27 +94,8 @@ def get_ol_has_ocaid_but_ia_has_no_ol_edition(
     """
     # Get the results, count them, and write the results to a TSV.
     message = "Total Internet Archive records where an Open Library Edition has an OCAID but Internet Archive has no Open Library Edition"  # noqa E501
-    result = db.get_ocaid_where_ol_edition_has_ocaid_and_ia_has_no_ol_edition()
-    process_result(result, out_file, message)
-
-
-def get_ol_has_ocaid_but_ia_has_no_ol_edition_join(
-    db: Database,
-    out_file: str = REPORT_OL_HAS_OCAID_IA_HAS_NO_OL_EDITION_JOIN,
-) -> None:
-    """
-    Get rows where Open Library has an Internet Archive OCAID, but for that
-    Internet Archive record there is no Open Library edition, except this time using
-    a database join rather than the Open Library values inserted into the Internet
-    Archive table.
-
-    :param Database db: an instance of the database.py class.
-    :param str out_file: path to the report output.
-    """
-    # Get the results, count them, and write the results to a TSV.
-    message = "Total Internet Archive records where an Open Library Edition has an OCAID but Internet Archive has no Open Library Edition"  # noqa E501
-    result = db.get_ocaid_where_ol_edition_has_ocaid_and_ia_has_no_ol_edition_join()
-    process_result(result, out_file, message)
+    sql = db.get_ocaid_where_ol_edition_has_ocaid_and_ia_has_no_ol_edition_sql()
+    process_result(db, sql, out_file, message)
 
 
 def get_editions_with_multiple_works(
@@ -133,8 +110,8 @@ def get_editions_with_multiple_works(
     message = (
         "Total Open Library Editions with more than on associated work"  # noqa E501
     )
-    result = db.get_editions_with_multiple_works()
-    process_result(result, out_file, message)
+    sql = db.get_editions_with_multiple_works_sql()
+    process_result(db, sql, out_file, message)
 
 
 def get_ia_links_to_ol_but_ol_edition_has_no_ocaid(
@@ -149,8 +126,8 @@ def get_ia_links_to_ol_but_ol_edition_has_no_ocaid(
     :param str out_file: path to the report output.
     """
     message = "Total Internet Archive items that link to an Open Library Edition, and that Edition does not have an OCAID"  # noqa E501
-    result = db.get_ia_links_to_ol_but_ol_edition_has_no_ocaid()
-    process_result(result, out_file, message)
+    sql = db.get_ia_links_to_ol_but_ol_edition_has_no_ocaid_sql()
+    process_result(db, sql, out_file, message)
 
 
 def get_ia_links_to_ol_but_ol_edition_has_no_ocaid_jsonl(
@@ -165,8 +142,8 @@ def get_ia_links_to_ol_but_ol_edition_has_no_ocaid_jsonl(
     :param str out_file: path to the report output.
     """
     message = "Total Internet Archive items that link to an Open Library Edition, and that Edition does not have an OCAID (per the JSONL dump, ensuring the IA item has only one ISBN 13)"  # noqa E501
-    result = db.get_ia_links_to_ol_but_ol_edition_has_no_ocaid_jsonl()
-    process_result(result, out_file, message)
+    sql = db.get_ia_links_to_ol_but_ol_edition_has_no_ocaid_jsonl_sql()
+    process_result(db, sql, out_file, message)
 
 
 def get_ia_links_to_ol_but_ol_edition_has_no_ocaid_jsonl_multiple(
@@ -182,8 +159,8 @@ def get_ia_links_to_ol_but_ol_edition_has_no_ocaid_jsonl_multiple(
     :param str out_file: path to the report output.
     """
     message = "Total Internet Archive items that link to an Open Library Edition, and that Edition does not have an OCAID (per the JSONL dump, ensuring the IA item has MULTIPLE ISBN 13s)"  # noqa E501
-    result = db.get_ia_links_to_ol_but_ol_edition_has_no_ocaid_jsonl_multiple()
-    process_result(result, out_file, message)
+    sql = db.get_ia_links_to_ol_but_ol_edition_has_no_ocaid_jsonl_multiple_sql()
+    process_result(db, sql, out_file, message)
 
 
 def get_ia_item_has_one_isbn_13_and_no_link_to_ol(
@@ -198,8 +175,8 @@ def get_ia_item_has_one_isbn_13_and_no_link_to_ol(
     :param str out_file: path to the report output.
     """
     message = "Total Internet Archive items that have one ISBN 13 and don't link to OL"  # noqa E501
-    result = db.get_ia_item_has_one_isbn_13_and_no_link_to_ol()
-    process_result(result, out_file, message)
+    sql = db.get_ia_item_has_one_isbn_13_and_no_link_to_ol_sql()
+    process_result(db, sql, out_file, message)
 
 
 def get_ol_edition_has_ocaid_but_no_ia_source_record(
@@ -214,8 +191,8 @@ def get_ol_edition_has_ocaid_but_no_ia_source_record(
     :param str out_file: path to the report output.
     """
     message = "Total Open Library Editions that have an OCAID but have no Internet Archive entry in their source_records"  # noqa E501
-    result = db.get_ol_edition_has_ocaid_but_no_ia_source_record()
-    process_result(result, out_file, message)
+    sql = db.get_ol_edition_has_ocaid_but_no_ia_source_record_sql()
+    process_result(db, sql, out_file, message)
 
 
 def get_ia_with_same_ol_edition_id(
@@ -232,8 +209,8 @@ def get_ia_with_same_ol_edition_id(
     message = (
         "Total Archive.org items with the same Open Library edition ID"  # noqa E501
     )
-    result = db.get_ia_id_with_same_ol_edition_id()
-    process_result(result, out_file, message)
+    sql = db.get_ia_id_with_same_ol_edition_id_sql()
+    process_result(db, sql, out_file, message)
 
 
 def get_broken_ol_ia_backlinks_after_edition_to_work_resolution0(
@@ -241,8 +218,8 @@ def get_broken_ol_ia_backlinks_after_edition_to_work_resolution0(
     out_file: str = REPORT_BROKEN_OL_IA_BACKLINKS_AFTER_EDITION_TO_WORK_RESOLUTION0,
 ) -> None:
     message = "Broken backlinks without many false positive"
-    result = db.get_broken_ol_ia_backlinks_after_edition_to_work_resolution0()
-    process_result(result, out_file, message)
+    sql = db.get_broken_ol_ia_backlinks_after_edition_to_work_resolution0_sql()
+    process_result(db, sql, out_file, message)
 
 
 def get_broken_ol_ia_backlinks_after_edition_to_work_resolution1(
@@ -250,5 +227,5 @@ def get_broken_ol_ia_backlinks_after_edition_to_work_resolution1(
     out_file: str = REPORT_BROKEN_OL_IA_BACKLINKS_AFTER_EDITION_TO_WORK_RESOLUTION1,
 ) -> None:
     message = "Broken backlinks many false positives. (Merge candidates?)"
-    result = db.get_broken_ol_ia_backlinks_after_edition_to_work_resolution1()
-    process_result(result, out_file, message)
+    sql = db.get_broken_ol_ia_backlinks_after_edition_to_work_resolution1_sql()
+    process_result(db, sql, out_file, message)
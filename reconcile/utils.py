@@ -1,63 +1,41 @@
 import csv
-import sys
-from collections.abc import Iterable, Iterator
+import mmap
+from collections.abc import Collection, Iterable, Iterator, Sequence
 from datetime import datetime
 from itertools import islice
 from pathlib import Path
-from typing import TypeVar
+from queue import Queue
+from threading import Thread
+from typing import Any, TypeVar, cast
 
-from isbnlib import is_isbn10, is_isbn13
+from isbnlib import is_isbn10, is_isbn13, to_isbn13
 
 # Various utility functions.
 
 T = TypeVar("T")
 
 
-def nuller(v: str | None) -> str | None:
-    """
-    Utility function to set '' to None so it's Null in DB. This may be
-    pointless.
-    """
-    if v == "":
-        return None
-    else:
-        return v
-
-
-def query_output_writer(query_result: list[str], out_file: str) -> None:
+def query_output_writer(query_result: Iterable[Any], out_file: str) -> tuple[int, int]:
     """
     Helper function to write output from queries to TSV.
-    """
-    with open(out_file, "w", encoding="UTF-8") as file:
-        writer = csv.writer(file, delimiter="\t")
-        for row in query_result:
-            writer.writerow(row)
-
 
-def bufcount(filename: str | Path) -> int:
-    """
-    Get the total number of lines in a file. Useful for TQDM progress bars.
-    Per https://stackoverflow.com/a/850962
+    Each row of {query_result} ends with the first-occurrence flag that
+    Database.query_iter_flag_duplicates() adds, which isn't written. Returns the row
+    count and the de-duplicated row count, which are tallied while writing so
+    {query_result} is only traversed once.
     """
-    if isinstance(filename, str):
-        path = Path(filename)
-    else:
-        path = filename
-
-    if not path.is_file():
-        print(f"Error counting lines in {path.cwd() / path.name}: file not found")
-        sys.exit(1)
-    with path.open(mode="r") as f:
-        lines = 0
-        buf_size = 1024 * 1024
-        read_f = f.read  # loop optimization
-
-        buf = read_f(buf_size)
-        while buf:
-            lines += buf.count("\n")
-            buf = read_f(buf_size)
+    count = 0
+    dedupe_count = 0
+    # Hand csv.writer whole batches and write through a larger buffer so the per-row
+    # work stays in C.
+    with open(out_file, "w", encoding="UTF-8", buffering=1024 * 1024) as file:
+        writer = csv.writer(file, delimiter="\t")
+        for batch in batcher(iter(query_result), 10_000):
+            writer.writerows(row[:-1] for row in batch)
+            count += len(batch)
+            dedupe_count += sum(row[-1] for row in batch)
 
-        return lines
+    return count, dedupe_count
 
 
 def path_check(pathname: str) -> None:
@@ -71,29 +49,95 @@ def path_check(pathname: str) -> None:
         path.mkdir(parents=True, exist_ok=True)
 
 
-def record_errors(err: list[str | None] | str, filename: str) -> None:
+def record_errors(err: Sequence[str | None] | str, filename: str) -> None:
     """
     Record {err} to {filename}.
 
     :param str filename: path to outfile
-    :param list err: error to record.
+    :param Sequence err: error to record.
     """
     with Path(filename).open(mode="a") as fp:
         fp.writelines(f"{datetime.now()}: {err}\n")
 
 
-def get_bad_isbn_10s(isbn_10s: Iterable[str]) -> list[str]:
+def get_bad_isbn_10s(isbn_10s: Collection[str]) -> list[str]:
     """
     Iterates thtrough canonical {isbn_10s} and returns a list of invalid ISBNs.
+    Editions often repeat an ISBN, so each distinct ISBN is only validated once.
     """
-    return [isbn for isbn in isbn_10s if not is_isbn10(isbn)]
+    bad = {isbn for isbn in set(isbn_10s) if not is_isbn10(isbn)}
+    return [isbn for isbn in isbn_10s if isbn in bad]
 
 
-def get_bad_isbn_13s(isbn_13s: Iterable[str]) -> list[str]:
+def get_bad_isbn_13s(isbn_13s: Collection[str]) -> list[str]:
     """
     Iterates thtrough canonical {isbn_13s} and returns a list of invalid ISBNs.
-    """
-    return [isbn for isbn in isbn_13s if not is_isbn13(isbn)]
+    Editions often repeat an ISBN, so each distinct ISBN is only validated once.
+    """
+    bad = {isbn for isbn in set(isbn_13s) if not is_isbn13(isbn)}
+    return [isbn for isbn in isbn_13s if isbn in bad]
+
+
+def isbn_10_to_13(isbn: str) -> str:
+    """
+    Convert {isbn} to an ISBN 13 the way isbnlib.to_isbn13() does, returning "" if it
+    isn't valid. Plain ten digit ISBN 10s, which are nearly all of them, are converted
+    here directly; anything else (hyphens, ISBN 13s, bad check digits) goes to isbnlib.
+    The all-zero placeholder passes the check digit test but isbnlib rejects it, so it
+    goes to isbnlib too.
+    """
+    if (
+        len(isbn) == 10
+        and isbn.isascii()
+        and isbn[:9].isdigit()
+        and isbn != "0000000000"
+    ):
+        digits = [ord(c) - 48 for c in isbn[:9]]
+        check_10 = -sum((10 - i) * d for i, d in enumerate(digits)) % 11
+        if isbn[9].upper() == ("X" if check_10 == 10 else chr(48 + check_10)):
+            # The 978 prefix contributes 9 + 7 * 3 + 8 = 38 to the weighted sum.
+            total = 38 + sum(d * (3 if i % 2 == 0 else 1) for i, d in enumerate(digits))
+            return f"978{isbn[:9]}{-total % 10}"
+
+    return cast(str, to_isbn13(isbn))
+
+
+def mmap_lines(
+    mm: mmap.mmap,
+    start: int = 0,
+    end: int | None = None,
+    window_size: int = 16 * 1024 * 1024,
+) -> Iterator[bytes]:
+    """
+    Yield the lines of {mm}, without their newlines, from byte {start} up to byte {end}
+    (or the end of {mm}). A line ending exactly at {end} is still included.
+
+    {mm} is read {window_size} bytes at a time and each window is split in one call,
+    which is much cheaper than finding every newline from Python. The unterminated
+    tail of a window is read again as the start of the next one.
+    """
+    end = len(mm) if end is None else min(end, len(mm))
+    pos = start
+    while pos < end:
+        window_end = min(pos + window_size, end)
+        lines = mm[pos:window_end].split(b"\n")
+        if window_end == end:
+            # A trailing newline leaves an empty last item that isn't a line.
+            if not lines[-1]:
+                lines.pop()
+            yield from lines
+            return
+        if len(lines) == 1:
+            # A single line longer than the window, so find its end directly.
+            newline = mm.find(b"\n", window_end, end)
+            if newline == -1:
+                newline = end
+            yield mm[pos:newline]
+            pos = newline + 1
+            continue
+        tail = lines.pop()
+        yield from lines
+        pos = window_end - len(tail)
 
 
 def batcher(iterator: Iterator[T], batch_size: int) -> Iterator[tuple[T, ...]]:
@@ -111,3 +155,31 @@ def batcher(iterator: Iterator[T], batch_size: int) -> Iterator[tuple[T, ...]]:
     """
     while batch := tuple(islice(iterator, batch_size)):
         yield batch
+
+
+def threaded_batcher(
+    iterator: Iterator[T], batch_size: int, max_batches: int = 32
+) -> Iterator[tuple[T, ...]]:
+    """
+    Like batcher(), but the batches are built on a background thread and buffered in a
+    queue of up to {max_batches}. This overlaps producing the items (e.g. parsing a
+    dump) with consuming them (e.g. SQLite INSERTs, which release the GIL).
+
+    Any exception raised while producing is re-raised in the consuming thread.
+    """
+    queue: Queue[tuple[T, ...] | BaseException | None] = Queue(maxsize=max_batches)
+
+    def produce() -> None:
+        try:
+            for batch in batcher(iterator, batch_size):
+                queue.put(batch)
+        except BaseException as err:
+            queue.put(err)
+        else:
+            queue.put(None)
+
+    Thread(target=produce, daemon=True).start()
+    while (item := queue.get()) is not None:
+        if isinstance(item, BaseException):
+            raise item
+        yield item
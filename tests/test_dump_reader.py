@@ -43,7 +43,7 @@ def test_make_chunk_ranges() -> None:
         OL_ALL_DUMP, 15_000
     ) == [  # Size must be identical everywhere.
         (0, 15_401, "./tests/seed_ol_dump_all.txt"),
-        (15_401, 30_401, "./tests/seed_ol_dump_all.txt"),
+        (15_401, 29_425, "./tests/seed_ol_dump_all.txt"),
     ]
 
 
@@ -57,14 +57,14 @@ def test_read_chunk_lines() -> None:
         "/books/OL001M",
         "3",
         "2010-04-14T02:53:24.620268",
-        '{"created": {"type": "/type/datetime", "value": "2008-04-01T03:28:50.625462"}, "covers": [5685889], "last_modified": {"type": "/type/datetime", "value": "2010-04-14T02:53:24.620268"}, "latest_revision": 3, "location": "/books/OL002M", "key": "/books/OL001M", "type": {"key": "/type/redirect"}, "revision": 3}\n',  # noqa #E501
+        b'{"created": {"type": "/type/datetime", "value": "2008-04-01T03:28:50.625462"}, "covers": [5685889], "last_modified": {"type": "/type/datetime", "value": "2010-04-14T02:53:24.620268"}, "latest_revision": 3, "location": "/books/OL002M", "key": "/books/OL001M", "type": {"key": "/type/redirect"}, "revision": 3}',  # noqa #E501
     ]
     fourth = [
         "/type/edition",
         "/books/OL003M",
         "4",
         "2010-04-14T02:44:13.274395",
-        '{"publishers": ["J. & A. Churchill"], "subtitle": "a treatise of decomposition", "covers": [5737156], "last_modified": {"type": "/type/datetime", "value": "2010-04-14T02:44:13.274395"}, "latest_revision": 4, "key": "/books/OL003M", "authors": [{"key": "/authors/OL2429124A"}], "ocaid": "backlink_diff_editions_same_work", "publish_places": ["London"], "pagination": "v. ;", "source_records": ["ia:backlink_diff_editions_same_work", "ia:commercialorgani04allerich", "ia:commercialorgani31allerich", "ia:commercialorgani32allerich", "ia:commercialorgani33allerich"], "created": {"type": "/type/datetime", "value": "2008-04-01T03:28:50.625462"}, "title": "Commercial organic analysis", "edition_name": "2d ed., rev. and enl.", "subjects": ["Chemistry, Analytic", "Chemistry, Organic"], "publish_date": "1884", "publish_country": "enk", "by_statement": "by Alfred H. Allen.", "works": [{"key": "/works/OL003W"}], "type": {"key": "/type/edition"}, "revision": 4}\n',  # noqa E501
+        b'{"publishers": ["J. & A. Churchill"], "subtitle": "a treatise of decomposition", "covers": [5737156], "last_modified": {"type": "/type/datetime", "value": "2010-04-14T02:44:13.274395"}, "latest_revision": 4, "key": "/books/OL003M", "authors": [{"key": "/authors/OL2429124A"}], "ocaid": "backlink_diff_editions_same_work", "publish_places": ["London"], "pagination": "v. ;", "source_records": ["ia:backlink_diff_editions_same_work", "ia:commercialorgani04allerich", "ia:commercialorgani31allerich", "ia:commercialorgani32allerich", "ia:commercialorgani33allerich"], "created": {"type": "/type/datetime", "value": "2008-04-01T03:28:50.625462"}, "title": "Commercial organic analysis", "edition_name": "2d ed., rev. and enl.", "subjects": ["Chemistry, Analytic", "Chemistry, Organic"], "publish_date": "1884", "publish_country": "enk", "by_statement": "by Alfred H. Allen.", "works": [{"key": "/works/OL003W"}], "type": {"key": "/type/edition"}, "revision": 4}',  # noqa E501
     ]
     lines = read_chunk_lines(chunk)
     next(lines)
@@ -85,25 +85,25 @@ def test_process_chunk_lines() -> None:
         "/books/OL001M",
         "3",
         "2010-04-14T02:53:24.620268",
-        '{"created": {"type": "/type/datetime", "value": "2008-04-01T03:28:50.625462"}, "covers": [5685889], "last_modified": {"type": "/type/datetime", "value": "2010-04-14T02:53:24.620268"}, "latest_revision": 3, "location": "/books/OL002M", "key": "/books/OL001M", "type": {"key": "/type/redirect"}, "revision": 3}\n',  # noqa #E501
+        b'{"created": {"type": "/type/datetime", "value": "2008-04-01T03:28:50.625462"}, "covers": [5685889], "last_modified": {"type": "/type/datetime", "value": "2010-04-14T02:53:24.620268"}, "latest_revision": 3, "location": "/books/OL002M", "key": "/books/OL001M", "type": {"key": "/type/redirect"}, "revision": 3}\n',  # noqa #E501
     ]
     edition = [
         "/type/edition",
         "/books/OL003M",
         "4",
         "2010-04-14T02:44:13.274395",
-        '{"publishers": ["J. & A. Churchill"], "subtitle": "a treatise of decomposition", "last_modified": {"type": "/type/datetime", "value": "2010-04-14T02:44:13.274395"}, "latest_revision": 4, "key": "/books/OL003M", "authors": [{"key": "/authors/OL2429124A"}], "ocaid": "backlink_diff_editions_same_work", "publish_places": ["London"], "pagination": "v. ;", "source_records": ["ia:backlink_diff_editions_same_work", "ia:commercialorgani04allerich", "ia:commercialorgani31allerich", "ia:commercialorgani32allerich", "ia:commercialorgani33allerich"], "created": {"type": "/type/datetime", "value": "2008-04-01T03:28:50.625462"}, "title": "Commercial organic analysis", "edition_name": "2d ed., rev. and enl.", "subjects": ["Chemistry, Analytic", "Chemistry, Organic"], "publish_date": "1884", "publish_country": "enk", "by_statement": "by Alfred H. Allen.", "works": [{"key": "/works/OL003W"}], "type": {"key": "/type/edition"}, "revision": 4}\n',  # noqa E501
+        b'{"publishers": ["J. & A. Churchill"], "subtitle": "a treatise of decomposition", "last_modified": {"type": "/type/datetime", "value": "2010-04-14T02:44:13.274395"}, "latest_revision": 4, "key": "/books/OL003M", "authors": [{"key": "/authors/OL2429124A"}], "ocaid": "backlink_diff_editions_same_work", "publish_places": ["London"], "pagination": "v. ;", "source_records": ["ia:backlink_diff_editions_same_work", "ia:commercialorgani04allerich", "ia:commercialorgani31allerich", "ia:commercialorgani32allerich", "ia:commercialorgani33allerich"], "created": {"type": "/type/datetime", "value": "2008-04-01T03:28:50.625462"}, "title": "Commercial organic analysis", "edition_name": "2d ed., rev. and enl.", "subjects": ["Chemistry, Analytic", "Chemistry, Organic"], "publish_date": "1884", "publish_country": "enk", "by_statement": "by Alfred H. Allen.", "works": [{"key": "/works/OL003W"}], "type": {"key": "/type/edition"}, "revision": 4}\n',  # noqa E501
     ]
     j = json.loads(edition[4])
     j["key"] = "/books/OL006M"
     edition2 = copy.copy(edition)
-    edition2[4] = json.dumps(j)
+    edition2[4] = json.dumps(j).encode()
     author = [
         "/type/author",
         "/authors/OL001A",
         "4",
         "2010-04-14T02:44:13.274395",
-        '{"type": {"key": "/type/author"}, "name": "Brian D. Egger", "key": "/authors/OL10001673A", "source_records": ["bwb:9781440580598"], "latest_revision": 1, "revision": 1, "created": {"type": "/type/datetime", "value": "2021-12-27T01:34:50.401635"}, "last_modified": {"type": "/type/datetime", "value": "2021-12-27T01:34:50.401635"}}\n',  # noqa E501
+        b'{"type": {"key": "/type/author"}, "name": "Brian D. Egger", "key": "/authors/OL10001673A", "source_records": ["bwb:9781440580598"], "latest_revision": 1, "revision": 1, "created": {"type": "/type/datetime", "value": "2021-12-27T01:34:50.401635"}, "last_modified": {"type": "/type/datetime", "value": "2021-12-27T01:34:50.401635"}}\n',  # noqa E501
     ]
     unprocessed_lines = [bad_index_values, redirect, edition, author, edition2]
     gen = process_chunk_lines(unprocessed_lines)
@@ -152,6 +152,10 @@ def test_write_processed_chunk_lines_to_disk() -> None:
     assert any(edition in file.read_text() for file in files) is True
     assert any(redirect in file.read_text() for file in files) is True
 
+    # OL1002158M has a cover, so its ISBN 13 is also written to a covers file.
+    cover_files = [file for file in files if "_cover_" in file.name]
+    assert any("9780201570519\n" in file.read_text() for file in cover_files) is True
+
 
 # TODO: This needs to do the test on each line it reads and
 # then call the correct parser.
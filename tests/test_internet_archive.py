@@ -1,4 +1,9 @@
-from reconcile.internet_archive import parse_ia_inlibrary_jsonl
+from pathlib import Path
+
+from reconcile.internet_archive import (
+    parse_ia_inlibrary_jsonl,
+    read_ia_physical_direct_rows,
+)
 
 
 def test_parse_ia_inlibrary_jsonl() -> None:
@@ -34,3 +39,17 @@ def test_parse_ia_inlibrary_jsonl() -> None:
     parsed_content = list(items)
 
     assert parsed_content[:3] == expected
+
+
+def test_read_ia_physical_direct_rows(tmp_path: Path) -> None:
+    """Verify the ia columns are read and short rows are skipped."""
+    f = tmp_path / "ia_physical_direct.tsv"
+    f.write_text(
+        "9780000000019\tnonchristianreli0000unse_h5s6\t\t\n"
+        "9780000000620\taltrenovelle0000tozz\n"
+        "9780000000620\taltrenovelle0000tozz\tOL9904439M\tOL16979473W\n"
+    )
+    assert list(read_ia_physical_direct_rows(str(f))) == [
+        ["nonchristianreli0000unse_h5s6", "", ""],
+        ["altrenovelle0000tozz", "OL9904439M", "OL16979473W"],
+    ]
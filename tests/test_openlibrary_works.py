@@ -12,6 +12,8 @@ from reconcile.openlibrary_works import (
     copy_db_column,
     create_resolved_edition_work_mapping,
     get_resolved_work_from_edition,
+    load_redirects,
+    update_column_from_pairs,
     update_redirected_ids,
 )
 from reconcile.redirect_resolver import create_redirects_db
@@ -121,6 +123,13 @@ def test_ia_table_is_updated_with_resolved_redirects(setup_db):
     assert db.query(sql2) == [("OL002M", "OL002W", "OL003W")]
 
 
+def test_load_redirects(setup_db):
+    _, redirect_db, _ = setup_db
+    redirects = load_redirects(redirect_db)
+    assert isinstance(redirects, dict)
+    assert redirects["OL001W"] == redirect_db.get("OL001W")
+
+
 def test_create_resolved_edition_work_mapping(setup_db_full):
     """ """
     _, _, map_db = setup_db_full
@@ -133,6 +142,17 @@ def test_get_resolved_work_from_edition(setup_db_full):
     assert get_resolved_work_from_edition(redirect_db, map_db, edition) == "OL003W"
 
 
+def test_get_resolved_work_from_edition_uses_cache(setup_db_full):
+    _, redirect_db, map_db = setup_db_full
+    cache: dict[str, bytes] = {}
+    assert (
+        get_resolved_work_from_edition(redirect_db, map_db, "OL001M", cache) == "OL003W"
+    )
+    assert cache["OL001M"] == b"OL003M"
+    # A cached edition is not looked up in redirect_db again.
+    assert get_resolved_work_from_edition({}, map_db, "OL001M", cache) == "OL003W"
+
+
 def test_build_ia_ol_edition_to_ol_work_column(setup_db_full):
     """ """
     # TODO: the docstring needs better explanation elsewhere. Put it in the actual
@@ -144,3 +164,15 @@ def test_build_ia_ol_edition_to_ol_work_column(setup_db_full):
     """
     build_ia_ol_edition_to_ol_work_column(db, redirect_db, map_db)
     assert db.query(sql) == [("OL003W",)]
+
+
+def test_update_column_from_pairs():
+    db = Database(":memory:")
+    db.execute("CREATE TABLE t (id TEXT, resolved_id TEXT)")
+    db.executemany("INSERT INTO t VALUES (?, ?)", [("a", "a"), ("b", "b"), ("c", "c")])
+    update_column_from_pairs(db, "t", "resolved_id", "id", [("z", "a"), ("z", "b")])
+    assert db.query("SELECT * FROM t ORDER BY id") == [
+        ("a", "z"),
+        ("b", "z"),
+        ("c", "c"),
+    ]
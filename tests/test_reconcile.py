@@ -1,4 +1,5 @@
 import configparser
+import sqlite3
 import sys
 
 # import csv
@@ -12,10 +13,11 @@ from reconcile.datatypes import ParsedEdition
 from reconcile.main import create_ia_jsonl_table, create_ia_table, create_ol_table
 from reconcile.openlibrary_editions import (
     insert_ol_cover_data_into_cover_db,
+    insert_ol_rows_from_file,
     process_edition_line,
+    read_ol_rows,
 )
 from reconcile.utils import (
-    bufcount,
     get_bad_isbn_10s,
     get_bad_isbn_13s,
     path_check,
@@ -39,9 +41,6 @@ REPORT_OL_IA_BACKLINKS = config.get(CONF_SECTION, "report_ol_ia_backlinks")
 REPORT_OL_HAS_OCAID_IA_HAS_NO_OL_EDITION = config.get(
     CONF_SECTION, "report_ol_has_ocaid_ia_has_no_ol_edition"
 )
-REPORT_OL_HAS_OCAID_IA_HAS_NO_OL_EDITION_JOIN = config.get(
-    CONF_SECTION, "report_ol_has_ocaid_ia_has_no_ol_edition_join"
-)
 REPORT_EDITIONS_WITH_MULTIPLE_WORKS = config.get(
     CONF_SECTION, "report_edition_with_multiple_works"
 )
@@ -171,6 +170,30 @@ def test_insert_ol_cover_data_into_cover_db() -> None:
     assert db.fetchall() == []
 
 
+def test_read_ol_rows_skips_empty_file(tmp_path: Path) -> None:
+    """A parsed chunk with no edition lines yields no rows rather than failing."""
+    f = tmp_path / "ol_dump_parsed_edition_0.txt"
+    f.touch()
+    assert list(read_ol_rows(f)) == []
+
+
+def test_insert_ol_rows_from_file_within_old_sqlite_variable_limit(
+    tmp_path: Path,
+) -> None:
+    """Each multi-row INSERT binds no more than the 999 parameters old SQLite allows."""
+    f = tmp_path / "ol_dump_parsed_edition_0.txt"
+    f.write_text("".join(f"OL{i}M\tOL{i}W\t\t\t0\t0\t0\n" for i in range(1000)))
+    db = Database(":memory:")
+    db.connection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+    db.execute(
+        "CREATE TABLE ol (ol_edition_id TEXT, ol_work_id TEXT, ol_ocaid TEXT, \
+        isbn_13 TEXT, has_multiple_works INTEGER, has_ia_source_record INTEGER, \
+        has_cover INTEGER, resolved_ol_edition_id TEXT, resolved_ol_work_id TEXT)"
+    )
+    insert_ol_rows_from_file(db, f)
+    assert db.query("SELECT COUNT(*) FROM ol") == [(1000,)]
+
+
 def test_get_items_from_ia_jsonl_table(setup_db) -> None:
     db = setup_db
     line1 = (
@@ -214,7 +237,7 @@ def test_process_line() -> None:
         "/books/OL1002158M",
         "11",
         "2021-02-12T23:39:01.417876",
-        r"""{"publishers": ["Addison-Wesley"], "identifiers": {"librarything": ["286951"], "goodreads": ["894978"]}, "subtitle": "the secrets of creative collaboration", "ia_box_id": ["IA150601"], "isbn_10": ["0201570513"], "covers": [3858623], "ia_loaded_id": ["organizinggenius00benn"], "lc_classifications": ["HD58.9 .B45 1997"], "key": "/books/OL1002158M", "authors": [{"key": "/authors/OL225457A"}], "publish_places": ["Reading, Mass"], "contributions": ["Biederman, Patricia Ward."], "pagination": "xvi, 239 p. ;", "source_records": ["marc:marc_records_scriblio_net/part25.dat:199740929:947", "marc:marc_cca/b10621386.out:27805251:1544", "ia:organizinggenius00benn", "marc:marc_loc_2016/BooksAll.2016.part25.utf8:105728045:947", "ia:organizinggenius0000benn"], "title": "Organizing genius", "dewey_decimal_class": ["158.7"], "notes": {"type": "/type/text", "value": "Includes bibliographical references (p. 219-229) and index.\n\"None of us is as smart as all of us.\""}, "number_of_pages": 239, "languages": [{"key": "/languages/eng"}], "lccn": ["96041454"], "subjects": ["Organizational effectiveness -- Case studies", "Strategic alliances (Business) -- Case studies", "Creative thinking -- Case studies", "Creative ability in business -- Case studies"], "publish_date": "1997", "publish_country": "mau", "by_statement": "Warren Bennis, Patricia Ward Biederman.", "works": [{"key": "/works/OL1883432W"}, {"key": "/works/OL0000000W"}], "type": {"key": "/type/edition"}, "ocaid": "organizinggenius0000benn", "latest_revision": 11, "revision": 11, "created": {"type": "/type/datetime", "value": "2008-04-01T03:28:50.625462"}, "last_modified": {"type": "/type/datetime", "value": "2021-02-12T23:39:01.417876"}}""",  # noqa E501
+        rb"""{"publishers": ["Addison-Wesley"], "identifiers": {"librarything": ["286951"], "goodreads": ["894978"]}, "subtitle": "the secrets of creative collaboration", "ia_box_id": ["IA150601"], "isbn_10": ["0201570513"], "covers": [3858623], "ia_loaded_id": ["organizinggenius00benn"], "lc_classifications": ["HD58.9 .B45 1997"], "key": "/books/OL1002158M", "authors": [{"key": "/authors/OL225457A"}], "publish_places": ["Reading, Mass"], "contributions": ["Biederman, Patricia Ward."], "pagination": "xvi, 239 p. ;", "source_records": ["marc:marc_records_scriblio_net/part25.dat:199740929:947", "marc:marc_cca/b10621386.out:27805251:1544", "ia:organizinggenius00benn", "marc:marc_loc_2016/BooksAll.2016.part25.utf8:105728045:947", "ia:organizinggenius0000benn"], "title": "Organizing genius", "dewey_decimal_class": ["158.7"], "notes": {"type": "/type/text", "value": "Includes bibliographical references (p. 219-229) and index.\n\"None of us is as smart as all of us.\""}, "number_of_pages": 239, "languages": [{"key": "/languages/eng"}], "lccn": ["96041454"], "subjects": ["Organizational effectiveness -- Case studies", "Strategic alliances (Business) -- Case studies", "Creative thinking -- Case studies", "Creative ability in business -- Case studies"], "publish_date": "1997", "publish_country": "mau", "by_statement": "Warren Bennis, Patricia Ward Biederman.", "works": [{"key": "/works/OL1883432W"}, {"key": "/works/OL0000000W"}], "type": {"key": "/type/edition"}, "ocaid": "organizinggenius0000benn", "latest_revision": 11, "revision": 11, "created": {"type": "/type/datetime", "value": "2008-04-01T03:28:50.625462"}, "last_modified": {"type": "/type/datetime", "value": "2021-02-12T23:39:01.417876"}}""",  # noqa E501
     ]
     # No ocaid, no multiple works, no ia source_record.
     noocaid_nomulti_no_ia = [
@@ -222,7 +245,7 @@ def test_process_line() -> None:
         "/books/OL10000149M",
         "2",
         "2010-03-11T23:51:36.723486",
-        r"""{"publishers": ["Stationery Office Books"], "key": "/books/OL10000149M", "created": {"type": "/type/datetime", "value": "2008-04-30T09:38:13.731961"}, "number_of_pages": 87, "isbn_13": ["9780107805548"], "physical_format": "Hardcover", "isbn_10": ["0107805545"], "publish_date": "December 31, 1994", "last_modified": {"type": "/type/datetime", "value": "2010-03-11T23:51:36.723486"}, "authors": [{"key": "/authors/OL46053A"}], "title": "40house of Lords Official Report", "latest_revision": 2, "works": [{"key": "/works/OL14903292W"}], "type": {"key": "/type/edition"}, "revision": 2}""",  # noqa E501
+        rb"""{"publishers": ["Stationery Office Books"], "key": "/books/OL10000149M", "created": {"type": "/type/datetime", "value": "2008-04-30T09:38:13.731961"}, "number_of_pages": 87, "isbn_13": ["9780107805548"], "physical_format": "Hardcover", "isbn_10": ["0107805545"], "publish_date": "December 31, 1994", "last_modified": {"type": "/type/datetime", "value": "2010-03-11T23:51:36.723486"}, "authors": [{"key": "/authors/OL46053A"}], "title": "40house of Lords Official Report", "latest_revision": 2, "works": [{"key": "/works/OL14903292W"}], "type": {"key": "/type/edition"}, "revision": 2}""",  # noqa E501
     ]
     # No work
     no_work = [
@@ -230,7 +253,7 @@ def test_process_line() -> None:
         "/books/OL10000149M",
         "2",
         "2010-03-11T23:51:36.723486",
-        r"""{"publishers": ["Stationery Office Books"], "key": "/books/OL10000149M", "created": {"type": "/type/datetime", "value": "2008-04-30T09:38:13.731961"}, "number_of_pages": 87, "isbn_13": ["9780107805548"], "physical_format": "Hardcover", "isbn_10": ["0107805545"], "publish_date": "December 31, 1994", "last_modified": {"type": "/type/datetime", "value": "2010-03-11T23:51:36.723486"}, "authors": [{"key": "/authors/OL46053A"}], "title": "40house of Lords Official Report", "latest_revision": 2, "type": {"key": "/type/edition"}, "revision": 2}""",  # noqa E501
+        rb"""{"publishers": ["Stationery Office Books"], "key": "/books/OL10000149M", "created": {"type": "/type/datetime", "value": "2008-04-30T09:38:13.731961"}, "number_of_pages": 87, "isbn_13": ["9780107805548"], "physical_format": "Hardcover", "isbn_10": ["0107805545"], "publish_date": "December 31, 1994", "last_modified": {"type": "/type/datetime", "value": "2010-03-11T23:51:36.723486"}, "authors": [{"key": "/authors/OL46053A"}], "title": "40house of Lords Official Report", "latest_revision": 2, "type": {"key": "/type/edition"}, "revision": 2}""",  # noqa E501
     ]
 
     assert process_edition_line(multi_works_source_rec) == (
@@ -280,7 +303,7 @@ def test_process_line_and_validate_isbn() -> None:
         "/books/OL10000149M",
         "2",
         "2010-03-11T23:51:36.723486",
-        r"""{"isbn_13": ["9780107805548", "XYZ", ""], "isbn_10": ["0107805545", "X111111111"]}""",  # noqa E501
+        rb"""{"isbn_13": ["9780107805548", "XYZ", ""], "isbn_10": ["0107805545", "X111111111"]}""",  # noqa E501
     ]
     process_edition_line(edition)
     assert "XYZ" in p.read_text()
@@ -298,7 +321,7 @@ def test_process_line_with_multiple_isbn13s() -> None:
         "/books/OL1002158M",
         "11",
         "2021-02-12T23:39:01.417876",
-        r"""{"publishers": ["Addison-Wesley"], "identifiers": {"librarything": ["286951"], "goodreads": ["894978"]}, "subtitle": "the secrets of creative collaboration", "ia_box_id": ["IA150601"], "isbn_10": ["0201570513", "145167550X"], "isbn_13": ["1234567890123"], "covers": [3858623], "ia_loaded_id": ["organizinggenius00benn"], "lc_classifications": ["HD58.9 .B45 1997"], "key": "/books/OL1002158M", "authors": [{"key": "/authors/OL225457A"}], "publish_places": ["Reading, Mass"], "contributions": ["Biederman, Patricia Ward."], "pagination": "xvi, 239 p. ;", "source_records": ["marc:marc_records_scriblio_net/part25.dat:199740929:947", "marc:marc_cca/b10621386.out:27805251:1544", "ia:organizinggenius00benn", "marc:marc_loc_2016/BooksAll.2016.part25.utf8:105728045:947", "ia:organizinggenius0000benn"], "title": "Organizing genius", "dewey_decimal_class": ["158.7"], "notes": {"type": "/type/text", "value": "Includes bibliographical references (p. 219-229) and index.\n\"None of us is as smart as all of us.\""}, "number_of_pages": 239, "languages": [{"key": "/languages/eng"}], "lccn": ["96041454"], "subjects": ["Organizational effectiveness -- Case studies", "Strategic alliances (Business) -- Case studies", "Creative thinking -- Case studies", "Creative ability in business -- Case studies"], "publish_date": "1997", "publish_country": "mau", "by_statement": "Warren Bennis, Patricia Ward Biederman.", "works": [{"key": "/works/OL1883432W"}, {"key": "/works/OL0000000W"}], "type": {"key": "/type/edition"}, "ocaid": "organizinggenius0000benn", "latest_revision": 11, "revision": 11, "created": {"type": "/type/datetime", "value": "2008-04-01T03:28:50.625462"}, "last_modified": {"type": "/type/datetime", "value": "2021-02-12T23:39:01.417876"}}""",  # noqa E501
+        rb"""{"publishers": ["Addison-Wesley"], "identifiers": {"librarything": ["286951"], "goodreads": ["894978"]}, "subtitle": "the secrets of creative collaboration", "ia_box_id": ["IA150601"], "isbn_10": ["0201570513", "145167550X"], "isbn_13": ["1234567890123"], "covers": [3858623], "ia_loaded_id": ["organizinggenius00benn"], "lc_classifications": ["HD58.9 .B45 1997"], "key": "/books/OL1002158M", "authors": [{"key": "/authors/OL225457A"}], "publish_places": ["Reading, Mass"], "contributions": ["Biederman, Patricia Ward."], "pagination": "xvi, 239 p. ;", "source_records": ["marc:marc_records_scriblio_net/part25.dat:199740929:947", "marc:marc_cca/b10621386.out:27805251:1544", "ia:organizinggenius00benn", "marc:marc_loc_2016/BooksAll.2016.part25.utf8:105728045:947", "ia:organizinggenius0000benn"], "title": "Organizing genius", "dewey_decimal_class": ["158.7"], "notes": {"type": "/type/text", "value": "Includes bibliographical references (p. 219-229) and index.\n\"None of us is as smart as all of us.\""}, "number_of_pages": 239, "languages": [{"key": "/languages/eng"}], "lccn": ["96041454"], "subjects": ["Organizational effectiveness -- Case studies", "Strategic alliances (Business) -- Case studies", "Creative thinking -- Case studies", "Creative ability in business -- Case studies"], "publish_date": "1997", "publish_country": "mau", "by_statement": "Warren Bennis, Patricia Ward Biederman.", "works": [{"key": "/works/OL1883432W"}, {"key": "/works/OL0000000W"}], "type": {"key": "/type/edition"}, "ocaid": "organizinggenius0000benn", "latest_revision": 11, "revision": 11, "created": {"type": "/type/datetime", "value": "2008-04-01T03:28:50.625462"}, "last_modified": {"type": "/type/datetime", "value": "2021-02-12T23:39:01.417876"}}""",  # noqa E501
     ]
     edition = process_edition_line(multi_isbn_13_source)
 
@@ -318,22 +341,6 @@ def test_process_line_with_multiple_isbn13s() -> None:
 ###########
 
 
-def test_bufcount() -> None:
-    """Count the number of lines in a file."""
-    f = Path("peaks.txt")
-    if f.exists():
-        raise Exception("peaks.txt exists.")
-    f.write_text("Olancha\nPeak\n")
-    assert bufcount("peaks.txt") == 2
-    f.unlink()
-
-
-def test_bufcount_fails_without_file() -> None:
-    """Verify bufcount() fails without a file."""
-    with pytest.raises(SystemExit):
-        bufcount("MountBrewer.txt")
-
-
 def test_path_check() -> None:
     """Verify the path creation helper utility works."""
     path = Path("Sierra_Peaks_Section")
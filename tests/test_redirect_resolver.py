@@ -3,6 +3,7 @@ import sys
 from collections.abc import Iterator
 from pathlib import Path
 
+import orjson
 import pytest
 from lmdbm import Lmdb
 
@@ -28,7 +29,7 @@ WORK_REDIRECT_1 = [
     "/books/OL001M",
     "3",
     "2010-04-14T02:53:24.620268",
-    """{"created": {"type": "/type/datetime", "value": "2008-04-01T03:28:50.625462"}, "covers": [5685889], "last_modified": {"type": "/type/datetime", "value": "2010-04-14T02:53:24.620268"}, "latest_revision": 3, "location": "/books/OL002M", "key": "/books/OL001M", "type": {"key": "/type/redirect"}, "revision": 3}""",  # noqa E501
+    b"""{"created": {"type": "/type/datetime", "value": "2008-04-01T03:28:50.625462"}, "covers": [5685889], "last_modified": {"type": "/type/datetime", "value": "2010-04-14T02:53:24.620268"}, "latest_revision": 3, "location": "/books/OL002M", "key": "/books/OL001M", "type": {"key": "/type/redirect"}, "revision": 3}""",  # noqa E501
 ]
 
 AUTHOR_REDIRECT_1 = [
@@ -36,7 +37,7 @@ AUTHOR_REDIRECT_1 = [
     "/authors/OL10219261A",
     "2",
     "2022-03-06T23:01:28.782362",
-    '{"key": "/authors/OL10219261A", "type": {"key": "/type/redirect"}, "location": "/authors/OL3894951A", "latest_revision": 2, "revision": 2, "created": {"type": "/type/datetime", "value": "2022-02-14T22:44:21.951940"}, "last_modified": {"type": "/type/datetime", "value": "2022-03-06T23:01:28.782362"}}',  # noqa E501
+    b'{"key": "/authors/OL10219261A", "type": {"key": "/type/redirect"}, "location": "/authors/OL3894951A", "latest_revision": 2, "revision": 2, "created": {"type": "/type/datetime", "value": "2022-02-14T22:44:21.951940"}, "last_modified": {"type": "/type/datetime", "value": "2022-03-06T23:01:28.782362"}}',  # noqa E501
 ]
 
 
@@ -64,6 +65,25 @@ def test_only_process_edition_and_work_redirects() -> None:
     assert process_redirect_line(AUTHOR_REDIRECT_1) is None
 
 
+@pytest.mark.parametrize(
+    "json",
+    [
+        rb'{"key": "/books/OL001M", "location": "\/books\/OL002M"}',
+        rb'{"key": "/books/OL001M", "location": "/books/OL\"002\\M"}',
+    ],
+)
+def test_process_redirect_line_with_escaped_location(json: bytes) -> None:
+    """
+    Verify a location the pattern can't read because of JSON escapes is decoded the
+    same way orjson decodes it.
+    """
+    line = ["/type/redirect", "/books/OL001M", "3", "2010-04-14T02:53:24.620268", json]
+    expected = orjson.loads(json)["location"].rpartition("/")[2]
+    assert process_redirect_line(line) == ParsedRedirect(
+        origin_id="OL001M", destination_id=expected
+    )
+
+
 def test_add_and_retrieve_items_from_db(setup_db) -> None:
     """
     Get an edition and a work redirect. And ensure non-redirects don't end up in
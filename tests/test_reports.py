@@ -36,9 +36,6 @@ REPORT_OL_IA_BACKLINKS = config.get(CONF_SECTION, "report_ol_ia_backlinks")
 REPORT_OL_HAS_OCAID_IA_HAS_NO_OL_EDITION = config.get(
     CONF_SECTION, "report_ol_has_ocaid_ia_has_no_ol_edition"
 )
-REPORT_OL_HAS_OCAID_IA_HAS_NO_OL_EDITION_JOIN = config.get(
-    CONF_SECTION, "report_ol_has_ocaid_ia_has_no_ol_edition_join"
-)
 REPORT_EDITIONS_WITH_MULTIPLE_WORKS = config.get(
     CONF_SECTION, "report_edition_with_multiple_works"
 )
@@ -191,19 +188,6 @@ def test_get_editions_with_multiple_works(setup_db) -> None:
     assert file.read_text() == "OL1002158M\n"
 
 
-def test_get_ol_has_ocaid_but_ia_has_no_ol_edition_union(setup_db) -> None:
-    """
-    Same as the other ol -> ocaid -> missing link query, but with a union.
-    """
-    db = setup_db
-    reports.get_ol_has_ocaid_but_ia_has_no_ol_edition_join(
-        db, REPORT_OL_HAS_OCAID_IA_HAS_NO_OL_EDITION_JOIN
-    )
-    file = Path(REPORT_OL_HAS_OCAID_IA_HAS_NO_OL_EDITION_JOIN)
-    assert file.is_file() is True
-    assert file.read_text() == "jewishchristiand0000boys\tOL1001295M\n"
-
-
 def test_get_ia_links_to_ol_but_ol_edition_has_no_ocaid(setup_db) -> None:
     """
     Verify records where Internet Archive links to an Open Library Edition, but Open
@@ -305,3 +289,20 @@ def test_get_ia_has_one_isbn_13_and_no_links_to_ol(
 #         report_count += 1
 
 #     assert report_count == 7
+
+
+def test_process_result_counts_distinct_rows_in_query_order(tmp_path, capsys) -> None:
+    """
+    Verify every row is written in the query's order, and that the de-duplicated count,
+    in which NULLs compare equal as with DISTINCT, comes from the same query.
+    """
+    db = Database(":memory:")
+    db.execute("CREATE TABLE t (a TEXT, b TEXT)")
+    db.executemany(
+        "INSERT INTO t VALUES (?, ?)",
+        [("a", "x"), ("c", None), ("b", "y"), ("c", None), ("a", "x")],
+    )
+    out_file = tmp_path / "report.tsv"
+    reports.process_result(db, "SELECT a, b FROM t ORDER BY a DESC", str(out_file), "T")
+    assert out_file.read_text() == "c\t\nc\t\nb\ty\na\tx\na\tx\n"
+    assert "T: 5\nDe-duplicated count: 3\n" in capsys.readouterr().out
@@ -29,3 +29,18 @@ def test_parse_edition_returns_list():
         0,
         "123,456",
     ]
+
+
+def test_parse_redirect_returns_tsv_line():
+    redirect = ParsedRedirect(origin_id="OL001M", destination_id="OL002M")
+    assert redirect.to_tsv_line() == "OL001M\tOL002M\n"
+
+
+def test_parse_edition_returns_tsv_line():
+    edition = ParsedEdition(edition_id="OL001M", isbn_13s="123,456")
+    assert edition.to_tsv_line() == "OL001M\t\t\t\t0\t0\t0\n"
+
+
+def test_parse_edition_returns_cover_line():
+    edition = ParsedEdition(edition_id="OL001M", has_cover=1, isbn_13s="123,456")
+    assert edition.to_cover_line() == "123,456\n"
@@ -1,14 +1,19 @@
+import mmap
+from collections.abc import Iterator
 from pathlib import Path
 
 import pytest
+from isbnlib import to_isbn13
 
 from reconcile.utils import (
     batcher,
-    bufcount,
     get_bad_isbn_10s,
     get_bad_isbn_13s,
+    isbn_10_to_13,
+    mmap_lines,
     path_check,
     record_errors,
+    threaded_batcher,
 )
 
 ###########
@@ -16,22 +21,6 @@ from reconcile.utils import (
 ###########
 
 
-def test_bufcount() -> None:
-    """Count the number of lines in a file."""
-    f = Path("peaks.txt")
-    if f.exists():
-        raise Exception("peaks.txt exists.")
-    f.write_text("Olancha\nPeak\n")
-    assert bufcount("peaks.txt") == 2
-    f.unlink()
-
-
-def test_bufcount_fails_without_file() -> None:
-    """Verify bufcount() fails without a file."""
-    with pytest.raises(SystemExit):
-        bufcount("MountBrewer.txt")
-
-
 def test_path_check() -> None:
     """Verify the path creation helper utility works."""
     path = Path("Sierra_Peaks_Section")
@@ -99,3 +88,45 @@ def test_batcher() -> None:
     assert next(batch) == ("OL1M", "OL2M")
     assert next(batch) == (("OL3M", "OL4M"), "OL5M")
     assert next(batch) == ("OL6M",)
+
+
+def test_threaded_batcher() -> None:
+    """Verify threaded_batcher batches like batcher, and re-raises producer errors."""
+    ol_ids = iter(["OL1M", "OL2M", ("OL3M", "OL4M"), "OL5M", "OL6M"])
+    assert list(threaded_batcher(ol_ids, 2, max_batches=1)) == [
+        ("OL1M", "OL2M"),
+        (("OL3M", "OL4M"), "OL5M"),
+        ("OL6M",),
+    ]
+
+    def broken() -> Iterator[str]:
+        yield "OL1M"
+        raise ValueError("bad dump line")
+
+    with pytest.raises(ValueError):
+        list(threaded_batcher(broken(), 2))
+
+
+def test_mmap_lines(tmp_path: Path) -> None:
+    """Verify mmap_lines splits on newlines, honours start/end, and keeps a last line."""
+    f = tmp_path / "peaks.txt"
+    f.write_bytes(b"Olancha\nPeak\nLangley")
+    with f.open("rb") as fp, mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        assert list(mmap_lines(mm)) == [b"Olancha", b"Peak", b"Langley"]
+        # The line ending exactly at {end} is included; the next one is not.
+        assert list(mmap_lines(mm, 0, 13)) == [b"Olancha", b"Peak"]
+        assert list(mmap_lines(mm, 13)) == [b"Langley"]
+        # Lines split across windows, or longer than a window, come back whole.
+        assert list(mmap_lines(mm, window_size=5)) == [b"Olancha", b"Peak", b"Langley"]
+        assert list(mmap_lines(mm, 0, 13, window_size=3)) == [b"Olancha", b"Peak"]
+
+
+def test_isbn_10_to_13() -> None:
+    """Verify ISBN 10s convert to the same ISBN 13s that isbnlib gives."""
+    assert isbn_10_to_13("0306406152") == "9780306406157"
+    assert isbn_10_to_13("080442957x") == "9780804429573"
+    assert isbn_10_to_13("0-306-40615-2") == "9780306406157"
+    assert isbn_10_to_13("9780306406157") == "9780306406157"
+    assert isbn_10_to_13("0306406153") == ""
+    assert isbn_10_to_13("a") == ""
+    assert isbn_10_to_13("0000000000") == to_isbn13("0000000000")